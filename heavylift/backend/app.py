@@ -1,7 +1,12 @@
 # backend/app.py
-from resume_search import search_resume, extract_gpa
-from typing import List, Optional
+from resume_search import extract_gpa
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import json
+import os
+import shutil
+import tempfile
+import threading
 import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -20,30 +25,50 @@ from models import (
     CorrectionsBulkIn,
     CorrectionsBulkOut,
 )
-from schema import CANONICAL_FIELDS
-from embeddings import classify_field_texts
+from schema import REGISTRY
+from embeddings import EMBEDDING_MODEL_ID, classify_field_texts, embedding_cache_stats
+from field_rules import match_rule_key
+import embeddings
 from reporting import append_scan_report  # you created this in backend/reporting.py
-from fastapi import UploadFile, File, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import MultipartParseError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select, desc
 import hashlib
 from pathlib import Path
-from db import engine, DATA_DIR, get_db
-from db_models import Base, Resume, Profile, ProfileVersion, FieldCorrection
-from resume_index import build_index_for_resume
+from db import engine, DATA_DIR, SessionLocal, add_missing_columns, get_async_db, get_db
+from db_models import Base, Resume, Profile, ProfileVersion, FieldCorrection, ResumeIndexJob
+import index_jobs
+from resume_index import build_index_for_resume, index_cache_stats
+from resume_bm25 import bm25_cache_stats
 from rag_config import (
     MIN_CONFIDENCE_TO_AUTOFILL,
     MIN_CONFIDENCE_TO_RETURN_VALUE,
     CANONICAL_CONFIDENCE_STRONG,
     MAX_FACTS_TO_SEND,
-    MAX_CHUNKS_TO_SEND,
+    RAG_MAX_CONCURRENCY,
+    RAG_BATCH_SIZE,
+    WARMUP_ON_STARTUP,
+    LEARNED_MAPPING_MIN_CONFIDENCE,
+    RESUME_MAX_BYTES,
+    UPLOAD_CHUNK_BYTES,
+    INDEX_ON_UPLOAD,
 )
 from profile_facts import build_facts
-from fact_retrieval import retrieve_top_facts
-from resume_index import search_resume
-from gemini_decider import decide_value
-from reporting import append_rag_trace
+from pipeline import PendingField, StageTimer
+from fact_retrieval import retrieve_top_facts_batch
+from hybrid_retrieval import hybrid_retrieval_stats, retrieve_resume_chunks
+from gemini_decider import VERTEX_MODEL, RagDecision, decide_values_batch_async, is_synthesized
+import gemini_decider
+from learned_mappings import lookup_keys, save_keys
+from corrections_cache import CachedCorrection, corrections_cache_stats, invalidate_corrections, lookup_corrections
+from corrections_store import bulk_upsert_corrections
+from decision_cache import cache_stats, get_decisions, make_cache_key, make_evidence_hash, put_decisions
+from reporting import append_rag_trace, flush_reports, reporting_stats
+import log_analytics
 import re
 from sqlalchemy.orm import Session
 from urllib.parse import urlparse
@@ -86,26 +111,23 @@ def lookup_source_for_key(key: str) -> str:
     Map a canonical key (like 'EMAIL' or 'WORK_AUTH_US') to a source string,
     e.g. 'profile.email' or 'preferences.workAuthUS' or 'none'.
     """
-    for field in CANONICAL_FIELDS:
-        if field["key"] == key:
-            return field.get("source", "none")
-    return "none"
+    return REGISTRY.source_for(key)
 
 
 def is_sensitive_key(key: str) -> bool:
     """
     Check whether a canonical key is marked as sensitive in CANONICAL_FIELDS.
     """
-    for field in CANONICAL_FIELDS:
-        if field["key"] == key:
-            return bool(field.get("sensitive", False))
-    return False
+    return REGISTRY.is_sensitive(key)
 
 
 def rule_based_key(field: FieldInput) -> Optional[str]:
     """
     Very cheap, high-precision rules for the obvious stuff and
     for clearly sensitive fields. Embeddings are used as fallback.
+
+    The rules and their precedence live in field_rules.RULES and are
+    compiled once into an ordered if-chain.
     """
     text = " ".join(
         [
@@ -114,156 +136,97 @@ def rule_based_key(field: FieldInput) -> Optional[str]:
             field.placeholder or "",
         ]
     ).lower()
+    return match_rule_key(text)
+
+
+# Classification stages, cheapest first. Each field is resolved by the first
+# stage that can place it; only what's left reaches the embedding model.
+CLASSIFY_STAGES = ("html_type", "rules", "learned", "embedding")
+
+# input[type] values that pin the canonical key outright
+_HTML_TYPE_KEYS = {"email": "EMAIL"}
+# weaker hints (type="tel" is also used for zip codes, SSNs, ...): only
+# applied when no rule matched the field text
+_HTML_TYPE_FALLBACK_KEYS = {"tel": "PHONE_MOBILE", "url": "PORTFOLIO_URL"}
 
-    # ---------- Highly sensitive IDs ----------
-    if "ssn" in text or "social security" in text or "social-security" in text:
-        return "SSN_OR_NATIONAL_ID"
-    if "national id" in text or "national identification" in text:
-        return "SSN_OR_NATIONAL_ID"
-    if "passport" in text:
-        return "PASSPORT_NUMBER"
-    if "driver" in text and "license" in text:
-        return "DRIVERS_LICENSE_NUMBER"
-
-    # ---------- Demographics (some of these you decided to autofill) ----------
-    if "date of birth" in text or "birth date" in text or "dob" in text:
-        return "DATE_OF_BIRTH"
-    if "race" in text or "ethnicity" in text:
-        return "RACE_ETHNICITY"
-    if "gender" in text:
-        return "GENDER"
-    if "disability" in text:
-        return "DISABILITY_STATUS"
-    if "veteran" in text:
-        return "VETERAN_STATUS"
-    if "sexual orientation" in text or "orientation" in text:
-        return "SEXUAL_ORIENTATION"
-    if "criminal" in text or "conviction" in text or "offense" in text:
-        return "CRIMINAL_HISTORY"
-
-    # ---------- Email / phone ----------
-    if "email" in text:
-        return "EMAIL"
-    if "mobile" in text or "cell" in text:
-        return "PHONE_MOBILE"
-    if "phone" in text and "mobile" not in text and "cell" not in text:
-        return "PHONE_MOBILE"
-
-    # ---------- Online presence ----------
-    if "linkedin" in text or "linked in" in text:
-        return "LINKEDIN_URL"
-    if "github" in text or "git hub" in text:
-        return "GITHUB_URL"
-    if "portfolio" in text or "website" in text or "personal site" in text:
-        return "PORTFOLIO_URL"
-
-    # ---------- Name fields (avoid company name) ----------
-    if "first name" in text or "given name" in text or "forename" in text:
-        return "FIRST_NAME"
-    if "middle name" in text:
-        return "MIDDLE_NAME"
-    if "last name" in text or "family name" in text or "surname" in text:
-        return "LAST_NAME"
-    if "preferred name" in text or "preferred first" in text:
-        return "PREFERRED_NAME"
-    if "full name" in text or (
-        "name" in text and "company" not in text and "employer" not in text
-    ):
-        return "FULL_NAME"
-
-    # ---------- Location ----------
-    if "city" in text and "current" in text:
-        return "CITY"
-    if "city" in text and "current" not in text and "state" not in text:
-        return "CITY"
-    if "state" in text or "province" in text or "region" in text:
-        return "STATE"
-    if "country" in text:
-        return "COUNTRY"
-    if "postal" in text or "zip" in text:
-        return "POSTAL_CODE"
-    if "current location" in text:
-        return "CURRENT_LOCATION"
-    if "location" in text and "preferred" not in text:
-        return "CURRENT_LOCATION"
-    if "preferred location" in text or "location preference" in text:
-        return "PREFERRED_LOCATION"
-
-    # ---------- Work authorization / preferences ----------
-    if "authorized to work" in text or "work authorization" in text:
-        if "united states" in text or "us" in text or "u.s." in text:
-            return "WORK_AUTH_US"
-        return "WORK_AUTH_COUNTRY"
-    if "sponsorship" in text:
-        return "NEED_SPONSORSHIP_FUTURE"
-    if "eligible to work" in text:
-        return "ELIGIBLE_TO_WORK_IN_COUNTRY_X"
-
-    if "willing to relocate" in text or "relocate" in text:
-        return "WILLING_TO_RELOCATE"
-    if "on-site" in text or "onsite" in text:
-        return "ON_SITE_OKAY"
-    if "hybrid" in text:
-        return "HYBRID_OKAY"
-    if "travel" in text and "%" in text:
-        return "TRAVEL_PERCENT_MAX"
-
-    # ---------- Timing & comp ----------
-    if "notice period" in text:
-        return "NOTICE_PERIOD"
-    if "earliest start" in text or "start date" in text:
-        return "EARLIEST_START_DATE"
-    if "salary expectation" in text or "desired salary" in text:
-        return "SALARY_EXPECTATIONS"
-    if "hourly rate" in text or "rate expectation" in text:
-        return "HOURLY_RATE_EXPECTATIONS"
-
-    # ---------- Education ----------
-    if "education level" in text or "highest education" in text:
-        return "HIGHEST_EDUCATION_LEVEL"
-    if "field of study" in text or "major" in text:
-        return "FIELD_OF_STUDY"
-    if "institution" in text or "university" in text or "college" in text:
-        return "INSTITUTION_NAME"
-    if "graduation year" in text or "grad year" in text:
-        return "GRADUATION_YEAR"
-
-    # ---------- Long answers ----------
-    if "tell us about yourself" in text:
-        return "LONG_ANSWER_FREEFORM"
-    if "why do you want to work here" in text or "motivation" in text:
-        return "LONG_ANSWER_FREEFORM"
-    if "describe a challenge" in text or "challenge you faced" in text:
-        return "LONG_ANSWER_FREEFORM"
-
-    return None
-
-
-def classify_fields_core(fields: List[FieldInput]) -> List[ClassifiedField]:
+_classify_lock = threading.Lock()
+_classify_counters: Dict[str, int] = {"fields": 0, **{s: 0 for s in CLASSIFY_STAGES}}
+
+
+def classify_fields_staged(
+    fields: List[FieldInput],
+    domain: Optional[str] = None,
+) -> Tuple[List[ClassifiedField], Dict[str, int]]:
     """
-    Core classification logic, used by both the /classify-fields endpoint
-    and internally by /generate-answers.
+    Ordered stages: html_type shortcuts -> compiled rules -> per-domain
+    learned mappings -> embeddings. Unresolved fields go to the model in a
+    single batched encode, and confident results are remembered for the
+    domain. Returns (results, per-stage counts).
     """
+    counts: Dict[str, int] = {s: 0 for s in CLASSIFY_STAGES}
     if not fields:
-        return []
+        return [], counts
 
-    texts = [build_field_text(f) for f in fields]
-    key_conf_pairs = classify_field_texts(texts)
+    resolved: List[Optional[Tuple[str, float]]] = [None] * len(fields)
+    pending: List[int] = []
 
-    results: List[ClassifiedField] = []
-    for f, (emb_key, emb_conf) in zip(fields, key_conf_pairs):
-        rb_key = rule_based_key(f)
+    # 1) html_type + 2) rules
+    for i, f in enumerate(fields):
+        html_type = (f.html_type or "").strip().lower()
+        if html_type in _HTML_TYPE_KEYS:
+            resolved[i] = (_HTML_TYPE_KEYS[html_type], 0.99)
+            counts["html_type"] += 1
+            continue
 
+        rb_key = rule_based_key(f)
         if rb_key is not None:
-            key = rb_key
             # Treat rule-based matches as high confidence
-            confidence = max(emb_conf, 0.99)
-        else:
-            key = emb_key
-            confidence = emb_conf
+            resolved[i] = (rb_key, 0.99)
+            counts["rules"] += 1
+            continue
 
-        source = lookup_source_for_key(key)
-        sensitive = is_sensitive_key(key)
+        if html_type in _HTML_TYPE_FALLBACK_KEYS:
+            resolved[i] = (_HTML_TYPE_FALLBACK_KEYS[html_type], 0.99)
+            counts["html_type"] += 1
+            continue
+
+        pending.append(i)
+
+    # 3) per-domain learned mappings
+    fingerprints: Dict[int, str] = {}
+    if pending and domain:
+        # Fields with no label/name/placeholder are indistinguishable from
+        # each other on a domain, so they are never learned or looked up.
+        fingerprints = {i: _learned_mapping_key(domain, fields[i]) for i in pending if _is_learnable(fields[i])}
+        learned = _with_session(lookup_keys, domain, list(fingerprints.values()))
+        still: List[int] = []
+        for i in pending:
+            fp = fingerprints.get(i)
+            hit = learned.get(fp) if fp is not None else None
+            if hit is not None:
+                resolved[i] = hit
+                counts["learned"] += 1
+            else:
+                still.append(i)
+        pending = still
+
+    # 4) embeddings, one batch for whatever is left
+    if pending:
+        key_conf_pairs = classify_field_texts([build_field_text(fields[i]) for i in pending])
+        to_learn: Dict[str, Tuple[str, float]] = {}
+        for i, (emb_key, emb_conf) in zip(pending, key_conf_pairs):
+            resolved[i] = (emb_key, emb_conf)
+            if i in fingerprints and emb_key != "UNKNOWN" and emb_conf >= LEARNED_MAPPING_MIN_CONFIDENCE:
+                to_learn[fingerprints[i]] = (emb_key, emb_conf)
+        counts["embedding"] = len(pending)
+        if to_learn:
+            _with_session(save_keys, domain, to_learn)
+
+    results: List[ClassifiedField] = []
+    for f, (key, confidence) in zip(fields, resolved):
+        meta = REGISTRY.get(key)
+        source = meta.source if meta is not None else "none"
+        sensitive = meta.sensitive if meta is not None else False
         autofill_allowed = (key != "UNKNOWN") and (source != "none") and (not sensitive)
 
         # Debug logging so you can see behavior
@@ -283,9 +246,34 @@ def classify_fields_core(fields: List[FieldInput]) -> List[ClassifiedField]:
             )
         )
 
+    with _classify_lock:
+        _classify_counters["fields"] += len(fields)
+        for stage, n in counts.items():
+            _classify_counters[stage] += n
+    print(f"[classify] stages: {counts} ({counts['embedding']}/{len(fields)} embedded)")
+
+    return results, counts
+
+
+def classify_fields_core(fields: List[FieldInput], domain: Optional[str] = None) -> List[ClassifiedField]:
+    """
+    Core classification logic, used by both the /classify-fields endpoint
+    and internally by /generate-answers.
+    """
+    results, _ = classify_fields_staged(fields, domain)
     return results
 
 
+def classification_stats() -> dict:
+    with _classify_lock:
+        counters = dict(_classify_counters)
+    total = counters["fields"]
+    return {
+        **counters,
+        "embedding_avoided_ratio": (1 - counters["embedding"] / total) if total else 0.0,
+    }
+
+
 def _norm(s: str | None) -> str:
     s = (s or "").strip().lower()
     s = re.sub(r"\s+", " ", s)
@@ -317,12 +305,45 @@ def make_field_fingerprint(
     return _sha1(material)
 
 
+def _field_fingerprint(domain: str, field: FieldInput) -> str:
+    return make_field_fingerprint(
+        domain=domain,
+        label=field.label or "",
+        name=field.name or "",
+        placeholder=field.placeholder or "",
+        field_type=field.tag or "",
+        html_type=field.html_type or "",
+    )
+
+
 def make_options_hash(options: list[str] | None) -> str:
     clean = [_norm(o) for o in (options or []) if _norm(o)]
     material = json.dumps(clean, ensure_ascii=False)
     return _sha1(material)
 
 
+# Learned mappings are only valid for the model and canonical key set that
+# produced them; either changing gives every field a new key.
+_LEARNED_MAPPING_VERSION = _sha1(
+    json.dumps([EMBEDDING_MODEL_ID, REGISTRY.keys, REGISTRY.embedding_texts], ensure_ascii=False)
+)
+
+
+def _is_learnable(field: FieldInput) -> bool:
+    return bool(_norm(field.label) or _norm(field.name) or _norm(field.placeholder))
+
+
+def _learned_mapping_key(domain: str, field: FieldInput) -> str:
+    """
+    FieldKeyMapping fingerprint: the field fingerprint plus its options
+    (two selects that differ only in options classify differently) and
+    the embedding model / schema version.
+    """
+    return _sha1(
+        "|".join([_field_fingerprint(domain, field), make_options_hash(field.options), _LEARNED_MAPPING_VERSION])
+    )
+
+
 def _domain_from_payload(payload: GenerateAnswersRequest) -> str:
     if payload.domain:
         return payload.domain
@@ -341,40 +362,370 @@ def _domain_from_payload(payload: GenerateAnswersRequest) -> str:
     return "unknown"
 
 
+def _answer_from_decision(field_id: str, decision: RagDecision) -> FieldAnswer:
+    confidence = float(decision.confidence)
+
+    # Safe mode thresholds: below 0.60 returns NULL
+    if confidence < MIN_CONFIDENCE_TO_RETURN_VALUE or confidence < MIN_CONFIDENCE_TO_AUTOFILL:
+        return FieldAnswer(
+            field_id=field_id,
+            value=None,
+            autofill=False,
+            confidence=confidence,
+            source_type="unknown",
+            source_ref=None,
+        )
+
+    return FieldAnswer(
+        field_id=field_id,
+        value=decision.value,
+        autofill=True,
+        confidence=confidence,
+        source_type=decision.source_type,
+        source_ref=decision.source_ref,
+    )
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _field_question(field: FieldInput) -> str:
+    return " ".join(
+        [
+            (field.label or "").strip(),
+            (field.placeholder or "").strip(),
+            (field.name or "").strip(),
+            ("Options: " + ", ".join(field.options or [])) if field.options else "",
+        ]
+    ).strip()
+
+
+_GPA_QUESTION = re.compile(r"\bgpa\b", re.IGNORECASE)
+
+
+async def _resolved(value=None):
+    return value
+
+
+# ---------- /generate-answers stages ----------
+# Each stage takes the fields still pending, answers what it can and
+# returns the rest, so precedence is simply the order the stages run in.
+
+
+def _stage_policy(pending: List[PendingField]) -> List[PendingField]:
+    """
+    Respect schema autofill_allowed (sensitive / unknown / no source).
+    """
+    rest = []
+    for p in pending:
+        if not p.cf.autofill_allowed:
+            p.answer = FieldAnswer(
+                field_id=p.cf.field_id,
+                value=None,
+                autofill=False,
+                confidence=float(p.cf.confidence),
+                source_type="unknown",
+                source_ref=None,
+            )
+        else:
+            rest.append(p)
+    return rest
+
+
+def _stage_corrections(
+    pending: List[PendingField], corrections: Dict[Tuple[str, str], CachedCorrection]
+) -> List[PendingField]:
+    """
+    Corrections Store: highest priority.
+    """
+    rest = []
+    for p in pending:
+        corr = corrections.get((p.fp, p.oh))
+        if corr and corr.correct_value:
+            p.answer = FieldAnswer(
+                field_id=p.cf.field_id,
+                value=corr.correct_value,
+                autofill=True,
+                confidence=0.99,
+                source_type="correction",
+                source_ref=f"corrections:{corr.id}",
+                fill_strategy=corr.fill_strategy,
+            )
+        else:
+            rest.append(p)
+    return rest
+
+
+def _stage_canonical(pending: List[PendingField], profile: dict, preferences: dict) -> List[PendingField]:
+    """
+    Fast path: canonical mapping when confidence is strong and the
+    profile / preferences actually have a value.
+    """
+    rest = []
+    for p in pending:
+        cf = p.cf
+        confidence = float(cf.confidence)
+        if cf.canonical_key != "UNKNOWN" and cf.source and confidence >= CANONICAL_CONFIDENCE_STRONG:
+            for prefix, values in (("profile", profile), ("preferences", preferences)):
+                if not cf.source.startswith(prefix + "."):
+                    continue
+                key = cf.source.split(".", 1)[1]
+                raw = (values or {}).get(key)
+                if isinstance(raw, str) and raw.strip():
+                    p.answer = FieldAnswer(
+                        field_id=cf.field_id,
+                        value=raw.strip(),
+                        autofill=True,
+                        confidence=confidence,
+                        source_type=prefix,
+                        source_ref=f"{prefix}.{key}",
+                    )
+        if p.answer is None:
+            rest.append(p)
+    return rest
+
+
+def _stage_resume_facts(pending: List[PendingField], gpa: Optional[str]) -> List[PendingField]:
+    """
+    Values read straight off the resume (GPA fast path, very reliable).
+    """
+    if not gpa:
+        return pending
+    rest = []
+    for p in pending:
+        if _GPA_QUESTION.search(p.question):
+            p.answer = FieldAnswer(
+                field_id=p.cf.field_id,
+                value=gpa,
+                autofill=True,
+                confidence=0.99,
+                source_type="resume",
+                source_ref="resume.gpa",
+            )
+        else:
+            rest.append(p)
+    return rest
+
+
+def _group_questions(pending: List[PendingField]) -> Dict[str, dict]:
+    """
+    Identical questions are retrieved for and decided once.
+    """
+    hard_groups: Dict[str, dict] = {}
+    for p in pending:
+        group = hard_groups.setdefault(
+            p.question,
+            {"id": f"q{len(hard_groups)}", "field": p.field, "fp": p.fp, "oh": p.oh, "members": []},
+        )
+        group["members"].append(p)
+    return hard_groups
+
+
+async def _retrieve_evidence(
+    resume_id: Optional[int],
+    facts_all: List[dict],
+    hard_groups: Dict[str, dict],
+    timer: Optional[StageTimer] = None,
+) -> Dict[str, tuple]:
+    """
+    (top_facts, top_chunks) per question id. Facts for every question come
+    from one batched pass, alongside hybrid (BM25 + FAISS) resume retrieval
+    for the whole batch, both off the event loop.
+    """
+    field_questions = list(hard_groups)
+    facts_per_question, chunks_per_question = await asyncio.gather(
+        asyncio.to_thread(retrieve_top_facts_batch, field_questions, facts_all, MAX_FACTS_TO_SEND),
+        retrieve_resume_chunks(resume_id, field_questions, timer),
+    )
+    return {
+        group["id"]: (top_facts, top_chunks)
+        for group, top_facts, top_chunks in zip(hard_groups.values(), facts_per_question, chunks_per_question)
+    }
+
+
+_gemini_sem: Optional[asyncio.Semaphore] = None
+_gemini_sem_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _gemini_semaphore() -> asyncio.Semaphore:
+    # One bound on in-flight Gemini batches across all requests, created on
+    # the running loop at first use (and again if the loop changed).
+    global _gemini_sem, _gemini_sem_loop
+    loop = asyncio.get_running_loop()
+    if _gemini_sem is None or _gemini_sem_loop is not loop:
+        _gemini_sem = asyncio.Semaphore(RAG_MAX_CONCURRENCY)
+        _gemini_sem_loop = loop
+    return _gemini_sem
+
+
+async def _decide_hard_groups(
+    domain: str,
+    resume_id: Optional[int],
+    hard_groups: Dict[str, dict],
+    evidence: Dict[str, tuple],
+    cache_decisions: bool = True,
+) -> None:
+    """
+    Send the questions to Gemini in structured-output batches, then fan the
+    decisions back out to each member field's answer.
+
+    Gemini batches run concurrently, bounded by RAG_MAX_CONCURRENCY across
+    all requests in the process.
+    Questions already decided on identical evidence are served from the
+    decision cache. cache_decisions=False skips storing fresh decisions
+    (evidence known to be incomplete, e.g. while the resume is indexing).
+    """
+    sem = _gemini_semaphore()
+
+    for group in hard_groups.values():
+        top_facts, top_chunks = evidence[group["id"]]
+        group["evidence_hash"] = make_evidence_hash(top_facts, top_chunks)
+        group["cache_key"] = make_cache_key(group["fp"], group["oh"], group["evidence_hash"], VERTEX_MODEL)
+
+    cached = await asyncio.to_thread(
+        _with_session, get_decisions, [g["cache_key"] for g in hard_groups.values()]
+    )
+    decisions: Dict[str, RagDecision] = {
+        g["id"]: RagDecision.model_validate(cached[g["cache_key"]])
+        for g in hard_groups.values()
+        if g["cache_key"] in cached
+    }
+
+    questions: List[dict] = []
+    for field_question, group in hard_groups.items():
+        if group["id"] in decisions:
+            continue
+        field: FieldInput = group["field"]
+        top_facts, top_chunks = evidence[group["id"]]
+        questions.append(
+            {
+                "id": group["id"],
+                "question": field_question,
+                "field_type": field.html_type or field.tag or "text",
+                "options": field.options or [],
+                "fact_keys": [f["key"] for f in top_facts],
+                "chunk_ids": [c["chunk_id"] for c in top_chunks],
+            }
+        )
+
+    async def decide(batch: List[dict]) -> Dict[str, RagDecision]:
+        facts_pool: Dict[str, dict] = {}
+        chunks_pool: Dict[object, dict] = {}
+        for q in batch:
+            top_facts, top_chunks = evidence[q["id"]]
+            for f in top_facts:
+                facts_pool.setdefault(f["key"], {"key": f["key"], "label": f["label"], "value": f["value"]})
+            for c in top_chunks:
+                chunks_pool.setdefault(c["chunk_id"], {"chunk_id": c["chunk_id"], "text": c["text"]})
+
+        async with sem:
+            return await decide_values_batch_async(
+                questions=batch,
+                candidate_facts=list(facts_pool.values()),
+                candidate_chunks=list(chunks_pool.values()),
+            )
+
+    batches = [questions[i : i + RAG_BATCH_SIZE] for i in range(0, len(questions), RAG_BATCH_SIZE)]
+    fresh: Dict[str, RagDecision] = {}
+    for part in await asyncio.gather(*(decide(b) for b in batches)):
+        fresh.update(part)
+    decisions.update(fresh)
+
+    # Only cache what the model actually returned; a placeholder for a
+    # question left out of a response would block it for the whole TTL.
+    cacheable = {qid: d for qid, d in fresh.items() if not is_synthesized(d)}
+    if cacheable and cache_decisions:
+        await asyncio.to_thread(
+            _with_session,
+            put_decisions,
+            [
+                {
+                    "cache_key": g["cache_key"],
+                    "domain": domain,
+                    "fingerprint": g["fp"],
+                    "options_hash": g["oh"],
+                    "evidence_hash": g["evidence_hash"],
+                    "resume_id": resume_id,
+                    "decision": cacheable[g["id"]].model_dump(),
+                }
+                for g in hard_groups.values()
+                if g["id"] in cacheable
+            ],
+        )
+
+    n_fields = sum(len(g["members"]) for g in hard_groups.values())
+    print(
+        f"[generate-answers] {len(hard_groups)} questions for {n_fields} fields: "
+        f"{len(hard_groups) - len(questions)} cached, {len(questions)} sent "
+        f"in {len(batches)} Gemini batch(es)"
+    )
+
+    for field_question, group in hard_groups.items():
+        decision = decisions[group["id"]]
+        top_facts, top_chunks = evidence[group["id"]]
+        for p in group["members"]:
+            cf = p.cf
+            append_rag_trace(
+                {
+                    "domain": domain,
+                    "field_id": cf.field_id,
+                    "canonical_key": cf.canonical_key,
+                    "canonical_source": cf.source,
+                    "canonical_confidence": cf.confidence,
+                    "field_question": field_question,
+                    "top_facts": top_facts,
+                    "top_chunks": [{"chunk_id": c["chunk_id"], "score": c["score"]} for c in top_chunks],
+                    "gemini_decision": decision.model_dump(),
+                    "batch_size": len(questions),
+                    "cache_hit": group["id"] not in fresh,
+                }
+            )
+            p.answer = _answer_from_decision(cf.field_id, decision)
+
+
 # ---------- Endpoints ----------
 
 
 @app.post("/classify-fields", response_model=ClassifyFieldsResponse)
 async def classify_fields(payload: ClassifyFieldsRequest) -> ClassifyFieldsResponse:
     fields: List[FieldInput] = payload.fields
-    results = classify_fields_core(fields)
-    return ClassifyFieldsResponse(results=results)
+    results, stage_counts = await asyncio.to_thread(classify_fields_staged, fields, payload.domain)
+    return ClassifyFieldsResponse(results=results, stage_counts=stage_counts)
 
 
 @app.post("/generate-answers", response_model=GenerateAnswersResponse)
 async def generate_answers(
     payload: GenerateAnswersRequest,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
 ) -> GenerateAnswersResponse:
     """
     Main endpoint the extension calls when user clicks 'Fill from saved info'.
 
-    Flow:
-      1) Classify fields -> canonical keys, sources, sensitivity.
-      2) For each field, try to pull a value from profile/preferences.
-      3) Optionally use RAG + Gemini for remaining fields.
-      4) Log trace server-side.
-      5) Return minimal fill instructions.
+    Batch pipeline over all fields of the form:
+      1) Classify, bulk correction lookup and resume-derived facts (GPA),
+         concurrently - none of them depends on another.
+      2) Resolve in precedence order: policy -> corrections -> canonical
+         profile/preferences -> resume facts.
+      3) Batched retrieval (facts + resume chunks) for what is left.
+      4) Batched Gemini decisions, trace logged server-side.
+    Per-stage wall time is returned in the Server-Timing header.
     """
+    timer = StageTimer()
     fields: List[FieldInput] = payload.fields or []
     profile = payload.profile or {}
     preferences = payload.preferences or {}
 
     # If extension didn't send resume_id (popup reset), fall back to latest resume
     if not payload.resume_id:
-        latest = db.query(Resume).order_by(Resume.id.desc()).first()
-        if latest:
-            payload.resume_id = latest.id
+        latest_id = await db.scalar(select(Resume.id).order_by(Resume.id.desc()).limit(1))
+        if latest_id:
+            payload.resume_id = latest_id
             print("[generate-answers] resume_id missing; using latest:", payload.resume_id)
         else:
             print("[generate-answers] resume_id missing; no resumes found")
@@ -382,208 +733,324 @@ async def generate_answers(
         print("[generate-answers] resume_id:", payload.resume_id)
 
     domain = _domain_from_payload(payload)
+    resume_id = payload.resume_id
+
+    # While the resume is (re)indexing its chunks/FAISS index are missing or
+    # stale: answer without vector search and don't cache those decisions.
+    indexing = False
+    if resume_id:
+        job = await db.scalar(index_jobs.latest_job_query(resume_id))
+        indexing = index_jobs.is_active(job)
+        if indexing:
+            print(f"[generate-answers] resume {resume_id} is still indexing ({job.status}); skipping resume search")
+
+    all_fields = [
+        PendingField(
+            slot=i,
+            field=f,
+            fp=_field_fingerprint(domain, f),
+            oh=make_options_hash(f.options or []),
+            question=_field_question(f),
+        )
+        for i, f in enumerate(fields)
+    ]
+    # (not while indexing: the chunk store is being rewritten)
+    wants_gpa = bool(resume_id) and not indexing and any(_GPA_QUESTION.search(p.question) for p in all_fields)
+
+    # 1) Independent lookups, each off the event loop with its own session
+    classified, corrections, gpa = await asyncio.gather(
+        timer.run("classify", asyncio.to_thread(classify_fields_core, fields, domain)),
+        timer.run(
+            "corrections",
+            asyncio.to_thread(_with_session, lookup_corrections, domain, [(p.fp, p.oh) for p in all_fields]),
+        ),
+        timer.run("resume_facts", asyncio.to_thread(_with_session, extract_gpa, resume_id))
+        if wants_gpa
+        else _resolved(None),
+    )
+    for p, cf in zip(all_fields, classified):
+        p.cf = cf
+
+    # 2) Cheap resolution, in precedence order
+    with timer.stage("resolve"):
+        pending = _stage_policy(all_fields)
+        pending = _stage_corrections(pending, corrections)
+        pending = _stage_canonical(pending, profile, preferences)
+        pending = _stage_resume_facts(pending, gpa)
+
+    # 3) + 4) Hard path: RAG + Gemini
+    if pending:
+        hard_groups = _group_questions(pending)
+        facts_all = build_facts(profile, preferences)
+        evidence = await timer.run(
+            "retrieval", _retrieve_evidence(None if indexing else resume_id, facts_all, hard_groups, timer)
+        )
+        await timer.run(
+            "llm", _decide_hard_groups(domain, resume_id, hard_groups, evidence, cache_decisions=not indexing)
+        )
 
-    # 1) Classification (this function already exists in app.py in your project)
-    classified = classify_fields_core(fields)
+    response.headers["Server-Timing"] = timer.header()
+    if indexing:
+        response.headers["X-Resume-Index"] = "indexing"
+    return GenerateAnswersResponse(suggestions=[p.answer for p in all_fields if p.answer is not None])
 
-    suggestions: List[FieldAnswer] = []
 
-    # Build facts once per request
-    facts_all = build_facts(profile, preferences)
 
-    for cf in classified:
-        field = next((f for f in fields if f.id == cf.field_id), None)
-        if not field:
-            continue
+@app.get("/stats")
+def get_stats(db: Session = Depends(get_db)):
+    return {
+        "decision_cache": cache_stats(db),
+        "corrections_cache": corrections_cache_stats(),
+        "faiss_index_cache": index_cache_stats(),
+        "bm25_index_cache": bm25_cache_stats(),
+        "hybrid_retrieval": hybrid_retrieval_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "classification": classification_stats(),
+        "reporting": reporting_stats(),
+    }
 
-        # Respect schema autofill_allowed
-        if not cf.autofill_allowed:
-            suggestions.append(
-                FieldAnswer(
-                    field_id=cf.field_id,
-                    value=None,
-                    autofill=False,
-                    confidence=float(cf.confidence),
-                    source_type="unknown",
-                    source_ref=None,
-                )
-            )
-            continue
-    
-            # 1.5) Corrections Store: highest priority
-        fp = make_field_fingerprint(
-            domain=domain,
-            label=field.label or "",
-            name=field.name or "",
-            placeholder=field.placeholder or "",
-            field_type=field.tag or "",
-            html_type=field.html_type or "",
-        )
-        oh = make_options_hash(field.options or [])
-
-        corr = (
-            db.query(FieldCorrection)
-            .filter(FieldCorrection.domain == domain)
-            .filter(FieldCorrection.fingerprint == fp)
-            .filter(FieldCorrection.options_hash == oh)
-            .first()
-        )
 
-        if corr and corr.correct_value:
-            suggestions.append(
-                FieldAnswer(
-                    field_id=cf.field_id,
-                    value=corr.correct_value,
-                    autofill=True,
-                    confidence=0.99,
-                    source_type="correction",
-                    source_ref=f"corrections:{corr.id}",
-                    fill_strategy=corr.fill_strategy,
-                )
-            )
-            continue
+@app.post("/analytics/ingest")
+def analytics_ingest():
+    """
+    Fold new report / RAG trace lines (including rotated archives) into
+    the analytics rollups.
+    """
+    flush_reports()
+    return {"ingested": log_analytics.ingest_logs()}
 
 
-        # 2) Fast path: canonical mapping when confidence strong
-        suggested_value: Optional[str] = None
-        source_type = "unknown"
-        source_ref: Optional[str] = None
-        confidence = float(cf.confidence)
+@app.get("/analytics")
+def analytics(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    domain: Optional[str] = None,
+    limit: int = 20,
+):
+    """
+    Unknown rate per canonical key, Gemini confidence histogram and top
+    unresolved questions per domain, from the rollups (days are UTC,
+    YYYY-MM-DD, inclusive).
+    """
+    return log_analytics.summary(since=since, until=until, domain=domain, limit=limit)
 
-        if cf.canonical_key != "UNKNOWN" and cf.source and confidence >= CANONICAL_CONFIDENCE_STRONG:
-            if cf.source.startswith("profile."):
-                key = cf.source.split(".", 1)[1]
-                raw = (profile or {}).get(key)
-                if isinstance(raw, str) and raw.strip():
-                    suggested_value = raw.strip()
-                    source_type = "profile"
-                    source_ref = f"profile.{key}"
 
-            elif cf.source.startswith("preferences."):
-                key = cf.source.split(".", 1)[1]
-                raw = (preferences or {}).get(key)
-                if isinstance(raw, str) and raw.strip():
-                    suggested_value = raw.strip()
-                    source_type = "preferences"
-                    source_ref = f"preferences.{key}"
-
-        # If we found a strong canonical value, autofill immediately
-        if suggested_value is not None:
-            suggestions.append(
-                FieldAnswer(
-                    field_id=cf.field_id,
-                    value=suggested_value,
-                    autofill=True,
-                    confidence=confidence,
-                    source_type=source_type,
-                    source_ref=source_ref,
-                )
-            )
-            continue
+@app.on_event("startup")
+def init_db():
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Base.metadata)
 
-        # 3) Hard path: RAG + Gemini
-        field_question = " ".join(
-            [
-                (field.label or "").strip(),
-                (field.placeholder or "").strip(),
-                (field.name or "").strip(),
-                ("Options: " + ", ".join(field.options or [])) if field.options else "",
-            ]
-        ).strip()
-# GPA fast-path (very reliable)
-        if payload.resume_id and re.search(r"\bgpa\b", field_question, re.IGNORECASE):
-            gpa = extract_gpa(db, payload.resume_id)
-            if gpa:
-                suggestions.append(
-                    FieldAnswer(
-                        field_id=cf.field_id,
-                        value=gpa,
-                        autofill=True,
-                        confidence=0.99,
-                        source_type="resume",
-                        source_ref="resume.gpa",
-                    )
-                )
-                continue
-        top_facts = retrieve_top_facts(field_question, facts_all, top_k=MAX_FACTS_TO_SEND)
-
-        top_chunks = []
-        if payload.resume_id:
-            try:
-                top_chunks = search_resume(db, payload.resume_id, field_question, top_k=MAX_CHUNKS_TO_SEND)
-            except Exception as e:
-                print("[resume search] failed:", e)
-                top_chunks = []
-
-        decision = decide_value(
-            field_question=field_question,
-            field_type=field.html_type or field.tag or "text",
-            options=field.options or [],
-            candidate_facts=top_facts,
-            candidate_chunks=top_chunks,
-        )
 
-        append_rag_trace(
-            {
-                "field_id": cf.field_id,
-                "canonical_key": cf.canonical_key,
-                "canonical_source": cf.source,
-                "canonical_confidence": cf.confidence,
-                "field_question": field_question,
-                "top_facts": top_facts,
-                "top_chunks": [{"chunk_id": c["chunk_id"], "score": c["score"]} for c in top_chunks],
-                "gemini_decision": decision.model_dump(),
-            }
-        )
+@app.on_event("startup")
+def start_index_jobs():
+    index_jobs.requeue_unfinished()
 
-        # Safe mode thresholds: below 0.60 returns NULL
-        if float(decision.confidence) < MIN_CONFIDENCE_TO_RETURN_VALUE:
-            suggestions.append(
-                FieldAnswer(
-                    field_id=cf.field_id,
-                    value=None,
-                    autofill=False,
-                    confidence=float(decision.confidence),
-                    source_type="unknown",
-                    source_ref=None,
-                )
-            )
-            continue
 
-        if float(decision.confidence) < MIN_CONFIDENCE_TO_AUTOFILL:
-            suggestions.append(
-                FieldAnswer(
-                    field_id=cf.field_id,
-                    value=None,
-                    autofill=False,
-                    confidence=float(decision.confidence),
-                    source_type="unknown",
-                    source_ref=None,
-                )
-            )
-            continue
+# ---------- Warmup / readiness ----------
+
+_warmup_lock = threading.Lock()
+_warmup_state: dict = {"status": "idle", "seconds": None, "errors": {}}
 
-        suggestions.append(
-            FieldAnswer(
-                field_id=cf.field_id,
-                value=decision.value,
-                autofill=True,
-                confidence=float(decision.confidence),
-                source_type=decision.source_type,
-                source_ref=decision.source_ref,
-            )
-        )
 
-    return GenerateAnswersResponse(suggestions=suggestions)
+def _run_warmup() -> dict:
+    """
+    Load the heavy subsystems that are otherwise imported lazily on first use.
+    Safe to call repeatedly / concurrently; failures are recorded per component.
+    """
+    with _warmup_lock:
+        if _warmup_state["status"] == "done":
+            return dict(_warmup_state)
 
+        _warmup_state["status"] = "running"
+        t0 = time.perf_counter()
+        errors: Dict[str, str] = {}
+
+        try:
+            embeddings.warmup()
+        except Exception as e:
+            errors["embeddings"] = str(e)
+        try:
+            import faiss  # noqa: F401
+        except Exception as e:
+            errors["faiss"] = str(e)
+        try:
+            gemini_decider.warmup()
+        except Exception as e:
+            errors["gemini"] = str(e)
+
+        _warmup_state["status"] = "failed" if errors else "done"
+        _warmup_state["seconds"] = round(time.perf_counter() - t0, 3)
+        _warmup_state["errors"] = errors
+        print(f"[warmup] {_warmup_state['status']} in {_warmup_state['seconds']}s", errors or "")
+        return dict(_warmup_state)
+
+
+def _readiness() -> dict:
+    components = {
+        "embeddings": embeddings.is_warm(),
+        "gemini": gemini_decider.is_client_ready(),
+    }
+    return {
+        # Classification needs the model; Gemini is only needed for the hard path
+        "ready": components["embeddings"],
+        "components": components,
+        "warmup": dict(_warmup_state),
+    }
 
 
 @app.on_event("startup")
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def start_warmup():
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=_run_warmup, name="heavylift-warmup", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_reporting():
+    flush_reports()
+
+
+@app.on_event("shutdown")
+def stop_index_jobs():
+    index_jobs.shutdown()
+
+
+@app.post("/warmup")
+async def warmup():
+    await asyncio.to_thread(_run_warmup)
+    return _readiness()
+
+
+@app.get("/ready")
+def ready():
+    state = _readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+# Allowance for the multipart envelope (boundaries, part headers, other
+# small fields) on top of RESUME_MAX_BYTES when checking Content-Length
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+async def _stream_upload(request: Request, field_name: str, directory: Path) -> Tuple[Path, str, str, int]:
+    """
+    Parse the multipart body straight off request.stream() and write the
+    `field_name` file part to a temp file in `directory`, hashing as it
+    goes. The body is never buffered whole: a Content-Length over the
+    limit is rejected before reading, and otherwise the request is cut off
+    with 413 as soon as the file passes RESUME_MAX_BYTES.
+    Returns (temp path, client filename, sha256 hex, size); the caller
+    owns the temp file.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Resume larger than {RESUME_MAX_BYTES} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > RESUME_MAX_BYTES + _MULTIPART_OVERHEAD_BYTES:
+        raise too_large
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    digest = hashlib.sha256()
+    size = 0
+    pending: List[bytes] = []
+    pending_bytes = 0
+    part = {"field": b"", "value": b"", "headers": {}, "is_file": False}
+    found: Dict[str, str] = {}
+
+    def on_part_begin() -> None:
+        part.update(field=b"", value=b"", headers={}, is_file=False)
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        part["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"], part["value"] = b"", b""
+
+    def on_headers_finished() -> None:
+        _, opts = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        if opts.get(b"name") == field_name.encode() and b"filename" in opts and not found:
+            found["filename"] = opts[b"filename"].decode("utf-8", "replace")
+            part["is_file"] = True
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        nonlocal size, pending_bytes
+        if not part["is_file"]:
+            return
+        chunk = bytes(data[start:end])
+        size += len(chunk)
+        if size > RESUME_MAX_BYTES:
+            raise _UploadTooLarge()
+        digest.update(chunk)
+        pending.append(chunk)
+        pending_bytes += len(chunk)
+
+    def on_part_end() -> None:
+        part["is_file"] = False
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                # Network chunks are small; hand the disk writes off in batches
+                if pending_bytes >= UPLOAD_CHUNK_BYTES:
+                    await asyncio.to_thread(out.writelines, list(pending))
+                    pending.clear()
+                    pending_bytes = 0
+            parser.finalize()
+            if pending:
+                await asyncio.to_thread(out.writelines, list(pending))
+        if not found:
+            raise HTTPException(status_code=400, detail=f"Missing '{field_name}' file in upload")
+    except _UploadTooLarge:
+        tmp_path.unlink(missing_ok=True)
+        raise too_large
+    except MultipartParseError as e:
+        tmp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {e}")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, found["filename"], digest.hexdigest(), size
+
+
+def _link_or_copy(src: Path, dst: Path) -> bool:
+    """
+    Content-addressed copy as a hardlink (no second write); falls back to
+    a copy where links aren't supported. An existing dst is kept.
+    Returns whether dst was created.
+    """
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        return False
+    except OSError:
+        if dst.exists():
+            return False
+        shutil.copyfile(src, dst)
+    return True
 
-def _sha256_bytes(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()
 
 def _safe_filename(name: str) -> str:
     name = name or "resume.pdf"
@@ -594,45 +1061,87 @@ def _safe_filename(name: str) -> str:
     return name
 
 
-@app.post("/resumes")
-async def upload_resume(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    sha = _sha256_bytes(content)
-    ext = Path(file.filename or "resume.pdf").suffix or ".pdf"
-    safe_name = _safe_filename(file.filename or f"resume{ext}")
-
+@app.post(
+    "/resumes",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_resume(request: Request, db: AsyncSession = Depends(get_async_db)):
     # Local storage base
     resumes_dir = DATA_DIR / "resumes"
     resumes_dir.mkdir(parents=True, exist_ok=True)
 
-    # 1) Create DB row first (we need id)
-    placeholder_path = str(resumes_dir / f"{sha}{ext}")
-    r = Resume(original_filename=file.filename or "resume", stored_path=placeholder_path, sha256=sha)
-    db.add(r)
-    db.commit()
-    db.refresh(r)
-
-    # 2) Save by resume id in a stable path
-    resume_folder = resumes_dir / str(r.id)
-    resume_folder.mkdir(parents=True, exist_ok=True)
-
-    final_path = resume_folder / safe_name
-    final_path.write_bytes(content)
-
-    # 3) Optionally also keep sha copy for dedupe (not required, but nice)
-    sha_path = resumes_dir / f"{sha}{ext}"
-    if not sha_path.exists():
-        sha_path.write_bytes(content)
-
-    # 4) Update DB stored_path to the final stable path
-    r.stored_path = str(final_path)
-    db.add(r)
-    db.commit()
-
-    return {"id": r.id, "filename": r.original_filename, "sha256": r.sha256, "created_at": r.created_at}
+    tmp_path, filename, sha, size = await _stream_upload(request, "file", resumes_dir)
+    created: List[Path] = []  # published files to remove if the transaction fails
+    try:
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        ext = Path(filename or "resume.pdf").suffix or ".pdf"
+        safe_name = _safe_filename(filename or f"resume{ext}")
+
+        # 1) Flush the row for its id; nothing is committed until the file is in place
+        r = Resume(original_filename=filename or "resume", stored_path="", sha256=sha)
+        db.add(r)
+        await db.flush()
+
+        # 2) Publish by resume id in a stable path (atomic rename, same filesystem)
+        resume_folder = resumes_dir / str(r.id)
+        resume_folder.mkdir(parents=True, exist_ok=True)
+        final_path = resume_folder / safe_name
+        await asyncio.to_thread(os.replace, tmp_path, final_path)
+        created.append(final_path)
+
+        # 3) Sha copy for dedupe, as a hardlink to the same bytes
+        sha_path = resumes_dir / f"{sha}{ext}"
+        if await asyncio.to_thread(_link_or_copy, final_path, sha_path):
+            created.append(sha_path)
+
+        r.stored_path = str(final_path)
+
+        # 4) Queue indexing in the same transaction; it runs in the process pool
+        job = None
+        if INDEX_ON_UPLOAD:
+            job = ResumeIndexJob(resume_id=r.id, pdf_path=str(final_path), status="queued")
+            db.add(job)
+        await db.commit()
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        # The row is rolled back (and its id may be reused): don't leave its files behind
+        for path in created:
+            path.unlink(missing_ok=True)
+        await db.rollback()
+        raise
+
+    if job is not None:
+        index_jobs.submit_job(job.id)
+
+    return {
+        "id": r.id,
+        "filename": r.original_filename,
+        "sha256": r.sha256,
+        "created_at": r.created_at,
+        "index_status": job.status if job is not None else "none",
+    }
+
+
+@app.get("/resumes/{resume_id}/index-status")
+def get_resume_index_status(resume_id: int, db: Session = Depends(get_db)):
+    if db.get(Resume, resume_id) is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return index_jobs.job_status(resume_id, db.scalar(index_jobs.latest_job_query(resume_id)))
 
 
 @app.get("/resumes")
@@ -715,8 +1224,8 @@ def upsert_corrections(
     payload: CorrectionsBulkIn,
     db: Session = Depends(get_db),
 ) -> CorrectionsBulkOut:
-    saved = 0
-    updated = 0
+    rows: List[dict] = []
+    touched: Dict[str, List[Tuple[str, str]]] = {}
 
     for item in payload.items:
         fp = make_field_fingerprint(
@@ -728,40 +1237,25 @@ def upsert_corrections(
             html_type=item.html_type or "",
         )
         oh = make_options_hash(item.options or [])
-
-        existing = (
-            db.query(FieldCorrection)
-            .filter(FieldCorrection.domain == item.domain)
-            .filter(FieldCorrection.fingerprint == fp)
-            .filter(FieldCorrection.options_hash == oh)
-            .first()
+        touched.setdefault(item.domain, []).append((fp, oh))
+        rows.append(
+            {
+                "domain": item.domain,
+                "fingerprint": fp,
+                "options_hash": oh,
+                "question_text": item.question_text,
+                "field_type": item.field_type,
+                "options_json": json.dumps(item.options or [], ensure_ascii=False),
+                "correct_value": item.correct_value,
+                "fill_strategy": item.fill_strategy,
+            }
         )
 
-        if existing:
-            existing.correct_value = item.correct_value
-            existing.fill_strategy = item.fill_strategy
-            existing.question_text = item.question_text
-            existing.field_type = item.field_type
-            existing.options_json = json.dumps(item.options or [], ensure_ascii=False)
-            existing.hits = (existing.hits or 0) + 1
-            db.add(existing)
-            updated += 1
-        else:
-            row = FieldCorrection(
-                domain=item.domain,
-                fingerprint=fp,
-                options_hash=oh,
-                question_text=item.question_text,
-                field_type=item.field_type,
-                options_json=json.dumps(item.options or [], ensure_ascii=False),
-                correct_value=item.correct_value,
-                fill_strategy=item.fill_strategy,
-                hits=1,
-            )
-            db.add(row)
-            saved += 1
+    saved, updated = bulk_upsert_corrections(db, rows)
 
-    db.commit()
+    # New corrections must apply on the very next /generate-answers
+    for domain, keys in touched.items():
+        invalidate_corrections(domain, keys)
     return CorrectionsBulkOut(saved=saved, updated=updated)
 
 @app.get("/corrections/export")
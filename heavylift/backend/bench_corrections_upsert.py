@@ -0,0 +1,140 @@
+# backend/bench_corrections_upsert.py
+"""
+Benchmark for /corrections/bulk persistence.
+
+    python bench_corrections_upsert.py [--items 10000] [--domains 20]
+
+_legacy_upsert below is a frozen copy of the per-item SELECT + ORM
+insert/update loop the endpoint used before bulk_upsert_corrections. Each
+implementation runs against its own fresh SQLite file: a first pass where
+every item is new, then a second pass over the same keys (all updates).
+The script checks both leave identical rows and report the same counts.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from corrections_store import bulk_upsert_corrections
+from db_models import Base, FieldCorrection
+
+
+def _legacy_upsert(db: Session, rows: List[dict]) -> Tuple[int, int]:
+    saved = 0
+    updated = 0
+    for item in rows:
+        existing = (
+            db.query(FieldCorrection)
+            .filter(FieldCorrection.domain == item["domain"])
+            .filter(FieldCorrection.fingerprint == item["fingerprint"])
+            .filter(FieldCorrection.options_hash == item["options_hash"])
+            .first()
+        )
+        if existing:
+            existing.correct_value = item["correct_value"]
+            existing.fill_strategy = item["fill_strategy"]
+            existing.question_text = item["question_text"]
+            existing.field_type = item["field_type"]
+            existing.options_json = item["options_json"]
+            existing.hits = (existing.hits or 0) + 1
+            db.add(existing)
+            updated += 1
+        else:
+            db.add(FieldCorrection(**item, hits=1))
+            saved += 1
+    db.commit()
+    return saved, updated
+
+
+def _rows(n: int, domains: int, value: str) -> List[dict]:
+    out = []
+    for i in range(n):
+        options = [f"opt {i % 7}", f"opt {i % 11}"] if i % 3 == 0 else []
+        out.append(
+            {
+                "domain": f"jobs{i % domains}.example.com",
+                "fingerprint": hashlib.sha1(f"field {i}".encode()).hexdigest(),
+                "options_hash": hashlib.sha1("|".join(options).encode()).hexdigest(),
+                "question_text": f"Question number {i}?",
+                "field_type": "select" if options else "text",
+                "options_json": json.dumps(options),
+                "correct_value": f"{value} {i}",
+                "fill_strategy": "select_exact" if options else "type_text",
+            }
+        )
+    return out
+
+
+def _snapshot(db: Session) -> list:
+    return db.execute(
+        select(
+            FieldCorrection.domain,
+            FieldCorrection.fingerprint,
+            FieldCorrection.options_hash,
+            FieldCorrection.correct_value,
+            FieldCorrection.fill_strategy,
+            FieldCorrection.hits,
+        ).order_by(FieldCorrection.domain, FieldCorrection.fingerprint, FieldCorrection.options_hash)
+    ).all()
+
+
+def _run(fn, path: Path, first: List[dict], second: List[dict]):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    timings = []
+    counts = []
+    for rows in (first, second):
+        with make_session() as db:
+            t0 = time.perf_counter()
+            counts.append(fn(db, rows))
+            timings.append(time.perf_counter() - t0)
+    with make_session() as db:
+        snapshot = _snapshot(db)
+    engine.dispose()
+    return timings, counts, snapshot
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=10000)
+    ap.add_argument("--domains", type=int, default=20)
+    args = ap.parse_args()
+
+    first = _rows(args.items, args.domains, "first")
+    second = _rows(args.items, args.domains, "second")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in [("legacy", _legacy_upsert), ("bulk", bulk_upsert_corrections)]:
+            results[name] = _run(fn, Path(tmp) / f"{name}.db", first, second)
+
+    for name, (timings, counts, _) in results.items():
+        print(
+            f"{name:<7} insert {args.items}: {timings[0] * 1000:8.1f} ms {counts[0]}   "
+            f"update {args.items}: {timings[1] * 1000:8.1f} ms {counts[1]}"
+        )
+
+    legacy, bulk = results["legacy"], results["bulk"]
+    if legacy[1] != bulk[1] or legacy[2] != bulk[2]:
+        print("MISMATCH: bulk upsert left different rows or counts than the legacy loop")
+        return 1
+    print(
+        f"identical rows; speedup insert x{legacy[0][0] / bulk[0][0]:.1f}, "
+        f"update x{legacy[0][1] / bulk[0][1]:.1f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# backend/bench_embeddings.py
+"""
+Compare embedding backends on the CANONICAL_FIELDS texts.
+
+    python bench_embeddings.py [--backends torch onnx onnx-int8] [--repeats 20]
+
+For each backend: single-text latency (p50/p95), batch throughput, and cosine
+agreement with the torch baseline (row-wise dot of the normalized outputs).
+Models are loaded directly, bypassing the embedding cache.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from embeddings import BACKENDS, load_model
+from schema import REGISTRY
+
+
+def _bench(model, texts, repeats: int) -> dict:
+    model.encode(texts, normalize_embeddings=True)  # warm up
+
+    single = []
+    for i in range(repeats):
+        t = texts[i % len(texts)]
+        t0 = time.perf_counter()
+        model.encode([t], normalize_embeddings=True)
+        single.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        vecs = model.encode(texts, normalize_embeddings=True)
+    batch_s = time.perf_counter() - t0
+
+    single.sort()
+    return {
+        "p50_ms": statistics.median(single),
+        "p95_ms": single[int(0.95 * (len(single) - 1))],
+        "texts_per_s": repeats * len(texts) / batch_s,
+        "vecs": np.asarray(vecs, dtype=np.float32),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    ap.add_argument("--repeats", type=int, default=20)
+    args = ap.parse_args()
+
+    texts = list(REGISTRY.embedding_texts)
+    backends = args.backends if "torch" in args.backends else ["torch"] + args.backends
+
+    results = {}
+    for name in backends:
+        t0 = time.perf_counter()
+        model = load_model(name)
+        load_s = time.perf_counter() - t0
+        results[name] = {"load_s": load_s, **_bench(model, texts, args.repeats)}
+
+    base = results["torch"]["vecs"]
+    print(f"{len(texts)} canonical texts, {args.repeats} repeats\n")
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>9} {'cos mean':>9} {'cos min':>8}")
+    for name in backends:
+        r = results[name]
+        cos = np.sum(r["vecs"] * base, axis=1)
+        print(
+            f"{name:<10} {r['load_s']:>7.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+            f"{r['texts_per_s']:>9.0f} {cos.mean():>9.4f} {cos.min():>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
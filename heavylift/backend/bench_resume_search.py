@@ -0,0 +1,172 @@
+# backend/bench_resume_search.py
+"""
+Benchmark resume keyword search: legacy substring scan vs BM25 index.
+
+    python bench_resume_search.py [--pages 2 10 40] [--queries 60] [--forms 5]
+
+_legacy_search below is a frozen copy of resume_search.search_resume before
+the BM25 index: load every chunk, lowercase it and run a substring test per
+query token. Synthetic resumes of the given page counts (~3000 characters
+a page) are ingested through resume_ingest like an upload, then each
+"form" asks --queries questions. Reported: per-query latency (p50/p95),
+time per form, and how often the legacy top hit is in the BM25 top-k.
+
+Uses HEAVYLIFT_DATA_DIR if set, otherwise a throwaway temp directory.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+os.environ.setdefault("HEAVYLIFT_DATA_DIR", tempfile.mkdtemp(prefix="heavylift-bench-"))
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from db import DATA_DIR, SessionLocal, engine
+from db_models import Base, Resume
+from resume_ingest import ingest_resume, load_chunks
+from resume_search import search_resume
+
+_SECTIONS = [
+    "Education: B.S. Computer Science, State University, GPA: 3.72 / 4.0, Dean's list.",
+    "Work authorization: authorized to work in the United States; no visa sponsorship required.",
+    "Experience: Senior software engineer building distributed data pipelines in Python and Go.",
+    "Skills: Kubernetes, PostgreSQL, Kafka, React, TypeScript, machine learning, FAISS.",
+    "Leadership: mentored five engineers and led the migration to an event-driven architecture.",
+    "Certifications: AWS Solutions Architect, Certified Kubernetes Administrator.",
+    "Projects: open-source contributor to a search engine; built a resume parser.",
+    "Contact: Jane Doe, Seattle, WA, willing to relocate, available to start in two weeks.",
+]
+
+_FILLER = (
+    "designed implemented delivered improved reduced latency throughput reliability customers "
+    "stakeholders quarterly roadmap cross-functional teams platform services api observability "
+    "testing deployment automation infrastructure analytics reporting dashboards budget vendor"
+).split()
+
+_QUESTIONS = [
+    "What is your GPA?",
+    "Are you legally authorized to work in the United States?",
+    "Will you now or in the future require visa sponsorship?",
+    "Years of experience with Python",
+    "Do you have Kubernetes experience?",
+    "Highest level of education completed",
+    "Are you willing to relocate?",
+    "When can you start?",
+    "List your certifications",
+    "Describe a leadership experience",
+    "Which databases have you used?",
+    "Have you worked with machine learning?",
+    "Current city and state",
+    "Tell us about a project you are proud of",
+    "What programming languages do you know?",
+]
+
+
+def _legacy_search(db: Session, resume_id: int, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    chunks = load_chunks(db, resume_id)
+    if not chunks:
+        return []
+
+    q = (query or "").lower()
+    tokens = [t for t in re.split(r"[^a-z0-9.]+", q) if t]
+    if not tokens:
+        return []
+
+    scored = []
+    for ch in chunks:
+        txt = (ch["text"] or "").lower()
+        score = 0.0
+        for t in tokens:
+            if t and t in txt:
+                score += 1.0
+        if score > 0:
+            scored.append({"chunk_id": ch["chunk_id"], "chunk_index": ch["chunk_index"], "text": ch["text"], "score": score})
+
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored[:top_k]
+
+
+def _resume_text(pages: int, rng: random.Random) -> str:
+    out: List[str] = []
+    while sum(len(p) for p in out) < pages * 3000:
+        if rng.random() < 0.15:
+            out.append(rng.choice(_SECTIONS))
+        else:
+            out.append(" ".join(rng.choice(_FILLER) for _ in range(rng.randint(8, 20))) + ".")
+    return " ".join(out)
+
+
+def _make_resume(db: Session, pages: int, rng: random.Random) -> int:
+    path = DATA_DIR / f"bench_resume_{pages}p.txt"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(_resume_text(pages, rng), encoding="utf-8")
+    r = Resume(original_filename=path.name, stored_path=str(path), sha256=f"bench-{pages}-{rng.random()}")
+    db.add(r)
+    db.commit()
+    ingest_resume(db, r.id)
+    return r.id
+
+
+def _time_forms(fn, db: Session, resume_id: int, forms: List[List[str]]) -> Dict[str, Any]:
+    per_query: List[float] = []
+    per_form: List[float] = []
+    results: List[List[Dict[str, Any]]] = []
+    for questions in forms:
+        f0 = time.perf_counter()
+        for q in questions:
+            t0 = time.perf_counter()
+            results.append(fn(db, resume_id, q, top_k=5))
+            per_query.append((time.perf_counter() - t0) * 1000)
+        per_form.append((time.perf_counter() - f0) * 1000)
+    per_query.sort()
+    return {
+        "p50": statistics.median(per_query),
+        "p95": per_query[int(0.95 * (len(per_query) - 1))],
+        "form": statistics.mean(per_form),
+        "results": results,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, nargs="+", default=[2, 10, 40])
+    ap.add_argument("--queries", type=int, default=60, help="questions per form")
+    ap.add_argument("--forms", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = random.Random(7)
+    Base.metadata.create_all(bind=engine)
+    print(f"data dir: {DATA_DIR}")
+
+    with SessionLocal() as db:
+        for pages in args.pages:
+            resume_id = _make_resume(db, pages, rng)
+            n_chunks = len(load_chunks(db, resume_id, ingest_missing=False))
+            forms = [[rng.choice(_QUESTIONS) for _ in range(args.queries)] for _ in range(args.forms)]
+
+            search_resume(db, resume_id, "warm up")  # load the index once, like a warm server
+            legacy = _time_forms(_legacy_search, db, resume_id, forms)
+            bm25 = _time_forms(search_resume, db, resume_id, forms)
+
+            top1 = [(a[0]["chunk_id"], {h["chunk_id"] for h in b}) for a, b in zip(legacy["results"], bm25["results"]) if a]
+            overlap = sum(1 for cid, ids in top1 if cid in ids) / max(1, len(top1))
+            print(
+                f"{pages:>3} pages / {n_chunks:>4} chunks  "
+                f"legacy p50 {legacy['p50']:7.3f} ms p95 {legacy['p95']:7.3f} ms form {legacy['form']:8.1f} ms   "
+                f"bm25 p50 {bm25['p50']:7.3f} ms p95 {bm25['p95']:7.3f} ms form {bm25['form']:8.1f} ms   "
+                f"x{legacy['form'] / bm25['form']:.1f}  legacy top-1 in bm25 top-5: {overlap:.0%}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# backend/bench_rule_matcher.py
+"""
+Micro-benchmark for the field rules.
+
+    python bench_rule_matcher.py [--fields 5000] [--repeats 5]
+
+Times match_rule_key (field_rules.RULES compiled into an if-chain) against
+the hand-written chain it replaced (test_field_rules._legacy_rule_key, the
+golden reference the tests compare against) on short real labels and on
+longer mixed texts.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from field_rules import MATCHER
+from test_field_rules import REAL_LABELS, _legacy_rule_key
+
+
+def _form(n: int, seed: int = 11) -> List[str]:
+    rng = random.Random(seed)
+    labels = [s.lower() for s in REAL_LABELS]
+    return [f"{rng.choice(labels)} q_{i} {rng.choice(labels)}" for i in range(n)]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fields", type=int, default=5000)
+    ap.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+
+    forms = {
+        "short labels": [s.lower() for s in REAL_LABELS] * max(1, args.fields // len(REAL_LABELS)),
+        "long texts": _form(args.fields),
+    }
+    for form_name, form in forms.items():
+        for name, fn in [("legacy", _legacy_rule_key), ("compiled", MATCHER.match)]:
+            best = float("inf")
+            for _ in range(args.repeats):
+                t0 = time.perf_counter()
+                for text in form:
+                    fn(text)
+                best = min(best, time.perf_counter() - t0)
+            print(
+                f"{form_name:<13} {name:<9} {len(form)} fields: "
+                f"{best * 1000:.2f} ms ({best / len(form) * 1e6:.2f} us/field)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# backend/bench_startup.py
+"""
+Import-time benchmark for the API process.
+
+    python bench_startup.py [--runs 5] [--budget-ms 1500]
+
+Imports app.py in fresh interpreters, reports the median wall time, and
+exits non-zero if it is over budget or if any heavy subsystem (torch,
+sentence-transformers, faiss, pypdf, google-genai) got imported eagerly.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "faiss", "pypdf", "google.genai"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app  # noqa: F401
+elapsed = time.perf_counter() - t0
+print(json.dumps({"ms": elapsed * 1000, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def _probe_once() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1500.0)
+    args = ap.parse_args()
+
+    results = [_probe_once() for _ in range(args.runs)]
+    times = [r["ms"] for r in results]
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    median = statistics.median(times)
+    print(f"import app: median {median:.0f} ms, min {min(times):.0f} ms, max {max(times):.0f} ms ({args.runs} runs)")
+    if heavy:
+        print("eagerly imported heavy modules:", ", ".join(heavy))
+
+    ok = median <= args.budget_ms and not heavy
+    print("OK" if ok else f"FAIL (budget {args.budget_ms:.0f} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
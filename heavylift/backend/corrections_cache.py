@@ -0,0 +1,134 @@
+# backend/corrections_cache.py
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db_models import FieldCorrection
+from rag_config import CORRECTIONS_CACHE_MAX_DOMAINS, CORRECTIONS_CACHE_MAX_PER_DOMAIN
+
+# (fingerprint, options_hash)
+CorrectionKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class CachedCorrection:
+    id: int
+    correct_value: Optional[str]
+    fill_strategy: Optional[str]
+
+
+# domain -> {(fp, oh): correction, or None when nothing is saved}. Negative
+# entries matter as much as hits: most fields of a form have no correction.
+_cache: "OrderedDict[str, OrderedDict[CorrectionKey, Optional[CachedCorrection]]]" = OrderedDict()
+_lock = threading.Lock()
+# Bumped by every invalidation; a lookup that raced a write doesn't store
+# what it read.
+_generation = 0
+_counters = {"hits": 0, "misses": 0, "queries": 0, "evictions": 0, "invalidations": 0}
+
+
+def _remember(domain: str, entries: Dict[CorrectionKey, Optional[CachedCorrection]]) -> None:
+    per_domain = _cache.get(domain)
+    if per_domain is None:
+        per_domain = _cache[domain] = OrderedDict()
+    _cache.move_to_end(domain)
+
+    for key, value in entries.items():
+        per_domain[key] = value
+        per_domain.move_to_end(key)
+    while len(per_domain) > CORRECTIONS_CACHE_MAX_PER_DOMAIN:
+        per_domain.popitem(last=False)
+        _counters["evictions"] += 1
+    while len(_cache) > CORRECTIONS_CACHE_MAX_DOMAINS:
+        _, dropped = _cache.popitem(last=False)
+        _counters["evictions"] += len(dropped)
+
+
+def lookup_corrections(
+    db: Session, domain: str, keys: Iterable[CorrectionKey]
+) -> Dict[CorrectionKey, CachedCorrection]:
+    """
+    Saved corrections for a form's fields. Cached keys are answered from
+    memory; the rest are resolved with one IN query on fingerprint.
+    """
+    wanted = set(keys)
+    found: Dict[CorrectionKey, CachedCorrection] = {}
+    with _lock:
+        per_domain = _cache.get(domain)
+        missing = set()
+        for key in wanted:
+            if per_domain is not None and key in per_domain:
+                per_domain.move_to_end(key)
+                if per_domain[key] is not None:
+                    found[key] = per_domain[key]
+            else:
+                missing.add(key)
+        if per_domain is not None:
+            _cache.move_to_end(domain)
+        _counters["hits"] += len(wanted) - len(missing)
+        _counters["misses"] += len(missing)
+        generation = _generation
+
+    if not missing:
+        return found
+
+    rows = db.execute(
+        select(
+            FieldCorrection.id,
+            FieldCorrection.fingerprint,
+            FieldCorrection.options_hash,
+            FieldCorrection.correct_value,
+            FieldCorrection.fill_strategy,
+        )
+        .where(FieldCorrection.domain == domain)
+        .where(FieldCorrection.fingerprint.in_({fp for fp, _ in missing}))
+    ).all()
+
+    fetched: Dict[CorrectionKey, Optional[CachedCorrection]] = {key: None for key in missing}
+    for row_id, fp, oh, value, strategy in rows:
+        if (fp, oh) in fetched:
+            fetched[(fp, oh)] = CachedCorrection(id=row_id, correct_value=value, fill_strategy=strategy)
+
+    with _lock:
+        _counters["queries"] += 1
+        if generation == _generation:
+            _remember(domain, fetched)
+
+    found.update({k: v for k, v in fetched.items() if v is not None})
+    return found
+
+
+def invalidate_corrections(domain: str, keys: Iterable[CorrectionKey]) -> None:
+    """
+    Forget cached entries (including "none saved") after corrections are
+    written, so the next lookup reads them back from the DB.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        per_domain = _cache.get(domain)
+        if per_domain is None:
+            return
+        for key in keys:
+            if key in per_domain:
+                del per_domain[key]
+                _counters["invalidations"] += 1
+
+
+def corrections_cache_stats() -> dict:
+    with _lock:
+        lookups = _counters["hits"] + _counters["misses"]
+        return {
+            **_counters,
+            "hit_ratio": (_counters["hits"] / lookups) if lookups else 0.0,
+            "domains": len(_cache),
+            "entries": sum(len(d) for d in _cache.values()),
+            "max_domains": CORRECTIONS_CACHE_MAX_DOMAINS,
+            "max_entries_per_domain": CORRECTIONS_CACHE_MAX_PER_DOMAIN,
+        }
@@ -0,0 +1,62 @@
+# backend/corrections_store.py
+from __future__ import annotations
+
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from db_models import FieldCorrection
+
+# Keeps each IN (...) well under SQLite's bound-parameter limit
+_LOOKUP_CHUNK = 500
+
+# Columns an existing correction takes from the incoming item
+_UPDATED_COLUMNS = ("question_text", "field_type", "options_json", "correct_value", "fill_strategy")
+
+
+def _existing_keys(db: Session, keys: Set[Tuple[str, str, str]]) -> Set[Tuple[str, str, str]]:
+    found: Set[Tuple[str, str, str]] = set()
+    ordered = list(keys)
+    for i in range(0, len(ordered), _LOOKUP_CHUNK):
+        part = ordered[i : i + _LOOKUP_CHUNK]
+        rows = db.execute(
+            select(FieldCorrection.domain, FieldCorrection.fingerprint, FieldCorrection.options_hash).where(
+                tuple_(FieldCorrection.domain, FieldCorrection.fingerprint, FieldCorrection.options_hash).in_(part)
+            )
+        ).all()
+        found.update(tuple(r) for r in rows)
+    return found
+
+
+def bulk_upsert_corrections(db: Session, rows: List[Dict[str, object]]) -> Tuple[int, int]:
+    """
+    Insert-or-update corrections keyed by uq_domain_fp_opts in one
+    transaction: INSERT ... ON CONFLICT DO UPDATE, executemany'd.
+
+    Each row needs domain, fingerprint, options_hash and the _UPDATED_COLUMNS.
+    Returns (saved, updated). Keys already in the table count as updated;
+    a key repeated within the batch is saved once and then updated, with
+    the last occurrence's values winning (hits counts every occurrence).
+    """
+    if not rows:
+        return 0, 0
+
+    keys = [(r["domain"], r["fingerprint"], r["options_hash"]) for r in rows]
+    distinct = set(keys)
+    saved = len(distinct - _existing_keys(db, distinct))
+    updated = len(keys) - saved
+
+    stmt = sqlite_insert(FieldCorrection)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FieldCorrection.domain, FieldCorrection.fingerprint, FieldCorrection.options_hash],
+        set_={
+            **{col: stmt.excluded[col] for col in _UPDATED_COLUMNS},
+            "hits": FieldCorrection.hits + 1,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt, [{**r, "hits": 1} for r in rows])
+    db.commit()
+    return saved, updated
@@ -3,7 +3,8 @@ import os
 from pathlib import Path
 from datetime import datetime, timezone
 
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 DATA_DIR = Path(os.getenv("HEAVYLIFT_DATA_DIR", Path(__file__).resolve().parent / "data"))
@@ -11,18 +12,78 @@ DB_PATH = DATA_DIR / "heavylift.sqlite3"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-engine = create_engine(f"sqlite:///{DB_PATH}", future=True)
+# How long a connection waits on a locked database before "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("HEAVYLIFT_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets readers run alongside the single writer instead of queueing
+    # behind it; NORMAL sync is durable enough in WAL mode and much cheaper.
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+engine = create_engine(
+    f"sqlite:///{DB_PATH}",
+    future=True,
+    connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+)
+event.listen(engine, "connect", _sqlite_pragmas)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Same database through aiosqlite, for async endpoints
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{DB_PATH}",
+    connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+)
+event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 class Base(DeclarativeBase):
     pass
 
 def utcnow():
     return datetime.now(timezone.utc)
 
+def add_missing_columns(metadata: MetaData) -> list:
+    """
+    create_all() never alters existing tables. Add the nullable columns
+    (and indexes) models gained since the database was created, via
+    SQLite ADD COLUMN. Returns the "table.column" names added.
+    """
+    added = []
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                if not col.nullable:
+                    raise RuntimeError(f"cannot add NOT NULL column {table.name}.{col.name} to an existing table")
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {col_type}'))
+                added.append(f"{table.name}.{col.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    if added:
+        print("[db] added columns:", ", ".join(added))
+    return added
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,9 +2,10 @@
 from sqlalchemy import String, DateTime, ForeignKey, Integer, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
+from typing import Optional
 from sqlalchemy import ForeignKey, Text
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, String, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, Float, Integer, LargeBinary, String, DateTime, Text, UniqueConstraint
 from sqlalchemy.sql import func
 from db import Base, utcnow
 
@@ -50,6 +51,10 @@ class ResumeChunk(Base):
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)  # 0..N (matches FAISS id)
     text: Mapped[str] = mapped_column(Text, nullable=False)
 
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)  # sha1 of text
+    embedding_model: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)  # model:backend of `embedding`
+    embedding: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # float32, normalized
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
 
@@ -77,3 +82,64 @@ class FieldCorrection(Base):
     __table_args__ = (
         UniqueConstraint("domain", "fingerprint", "options_hash", name="uq_domain_fp_opts"),
     )
+
+
+class DecisionCacheEntry(Base):
+    __tablename__ = "decision_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # sha1(fp|opts|evidence|model)
+    domain = Column(String(255), index=True)
+    fingerprint = Column(String(64), index=True)          # make_field_fingerprint
+    options_hash = Column(String(64))                     # make_options_hash
+    evidence_hash = Column(String(64))                    # sha1 of facts/chunks sent to Gemini
+    resume_id = Column(Integer, index=True, nullable=True)
+
+    decision_json = Column(Text, nullable=False)          # RagDecision as JSON
+
+    hits = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    last_used_at = Column(DateTime(timezone=True), default=utcnow, index=True, nullable=False)
+
+
+class FieldKeyMapping(Base):
+    __tablename__ = "field_key_mappings"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    domain = Column(String(255), index=True)              # jobs.lever.co
+    fingerprint = Column(String(64), index=True)          # app._learned_mapping_key
+
+    canonical_key = Column(String(64), nullable=False)
+    confidence = Column(Float, nullable=False)            # embedding similarity when learned
+
+    hits = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("domain", "fingerprint", name="uq_mapping_domain_fp"),
+    )
+
+
+class ResumeIndexJob(Base):
+    __tablename__ = "resume_index_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    resume_id = Column(Integer, index=True, nullable=False)
+    pdf_path = Column(String, nullable=False)
+    status = Column(String(16), index=True, nullable=False)   # queued/running/done/failed
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    owner_pid = Column(Integer, nullable=True)  # pool worker that claimed the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # refreshed while running
+
+    queued_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    queue_wait_ms = Column(Float, nullable=True)
+    duration_ms = Column(Float, nullable=True)
@@ -0,0 +1,151 @@
+# backend/decision_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from db import utcnow
+from db_models import DecisionCacheEntry
+from rag_config import DECISION_CACHE_MAX_ENTRIES, DECISION_CACHE_TTL_SECONDS
+
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+
+def _bump(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def make_evidence_hash(facts: List[Dict[str, Any]], chunks: List[Dict[str, Any]]) -> str:
+    """
+    Digest of exactly what Gemini sees for a field. Any change to the profile
+    values or resume chunks produces a new digest, so stale decisions are
+    never served for new evidence.
+    """
+    material = {
+        "facts": sorted([f["key"], f["value"]] for f in facts),
+        "chunks": sorted([str(c["chunk_id"]), c["text"]] for c in chunks),
+    }
+    return hashlib.sha1(json.dumps(material, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def make_cache_key(fingerprint: str, options_hash: str, evidence_hash: str, model: str) -> str:
+    material = "|".join([fingerprint, options_hash, evidence_hash, model])
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+
+def get_decisions(db: Session, keys: List[str]) -> Dict[str, dict]:
+    """
+    Bulk lookup. Returns {cache_key: decision dict} for live entries and
+    bumps their LRU timestamp / hit count.
+    """
+    if not keys:
+        return {}
+
+    cutoff = utcnow() - timedelta(seconds=DECISION_CACHE_TTL_SECONDS)
+    rows = db.execute(
+        select(DecisionCacheEntry.cache_key, DecisionCacheEntry.decision_json)
+        .where(DecisionCacheEntry.cache_key.in_(set(keys)))
+        .where(DecisionCacheEntry.created_at >= cutoff)
+    ).all()
+    found = {k: json.loads(v) for k, v in rows}
+
+    if found:
+        db.execute(
+            update(DecisionCacheEntry)
+            .where(DecisionCacheEntry.cache_key.in_(list(found)))
+            .values(last_used_at=utcnow(), hits=DecisionCacheEntry.hits + 1)
+        )
+        db.commit()
+
+    _bump("hits", len(found))
+    _bump("misses", len(set(keys)) - len(found))
+    return found
+
+
+def put_decisions(db: Session, entries: List[Dict[str, Any]]) -> None:
+    """
+    entries: [{cache_key, domain, fingerprint, options_hash, evidence_hash,
+               resume_id, decision}] where decision is a plain dict.
+    """
+    if not entries:
+        return
+
+    now = utcnow()
+    rows = [
+        {
+            "cache_key": e["cache_key"],
+            "domain": e["domain"],
+            "fingerprint": e["fingerprint"],
+            "options_hash": e["options_hash"],
+            "evidence_hash": e["evidence_hash"],
+            "resume_id": e.get("resume_id"),
+            "decision_json": json.dumps(e["decision"], ensure_ascii=False),
+            "hits": 0,
+            "created_at": now,
+            "last_used_at": now,
+        }
+        for e in entries
+    ]
+    stmt = sqlite_insert(DecisionCacheEntry)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DecisionCacheEntry.cache_key],
+        set_={
+            "decision_json": stmt.excluded.decision_json,
+            "created_at": stmt.excluded.created_at,
+            "last_used_at": stmt.excluded.last_used_at,
+        },
+    )
+    db.execute(stmt, rows)
+    _bump("stores", len(rows))
+
+    _evict(db)
+    db.commit()
+
+
+def _evict(db: Session) -> None:
+    total = db.execute(select(func.count(DecisionCacheEntry.id))).scalar_one()
+    excess = total - DECISION_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+
+    oldest = (
+        select(DecisionCacheEntry.id)
+        .order_by(DecisionCacheEntry.last_used_at.asc())
+        .limit(excess)
+        .scalar_subquery()
+    )
+    db.execute(delete(DecisionCacheEntry).where(DecisionCacheEntry.id.in_(oldest)))
+    _bump("evictions", excess)
+
+
+def invalidate_resume(db: Session, resume_id: int) -> int:
+    """
+    Drop every decision whose evidence came from this resume (called when
+    the resume is re-indexed).
+    """
+    res = db.execute(delete(DecisionCacheEntry).where(DecisionCacheEntry.resume_id == resume_id))
+    db.commit()
+    _bump("invalidations", res.rowcount or 0)
+    return res.rowcount or 0
+
+
+def cache_stats(db: Session) -> dict:
+    with _lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        **counters,
+        "hit_ratio": (counters["hits"] / lookups) if lookups else 0.0,
+        "entries": db.execute(select(func.count(DecisionCacheEntry.id))).scalar_one(),
+        "max_entries": DECISION_CACHE_MAX_ENTRIES,
+        "ttl_seconds": DECISION_CACHE_TTL_SECONDS,
+    }
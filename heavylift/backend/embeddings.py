@@ -1,23 +1,249 @@
 # backend/embeddings.py
 
-from typing import List, Dict, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from schema import CANONICAL_FIELDS
+from db import DATA_DIR
+from rag_config import EMBED_BACKEND, EMBED_CACHE_DISK, EMBED_CACHE_MEMORY_ITEMS, EMBED_ONNX_INT8_FILE
+from schema import REGISTRY
 
-# Load a small, fast sentence transformer
-_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-# Precompute embeddings for canonical fields
-_can_texts = [
-    f"{field['key']}: {field['description']}" for field in CANONICAL_FIELDS
-]
-_can_embeddings = _model.encode(_can_texts, normalize_embeddings=True)
-_can_keys = [field["key"] for field in CANONICAL_FIELDS]
+# Backend name -> SentenceTransformer kwargs. All of them run the same
+# tokenizer + mean pooling, and encode() normalizes identically.
+BACKENDS: Dict[str, dict] = {
+    "torch": {},
+    "onnx": {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model.onnx"}},
+    "onnx-int8": {"backend": "onnx", "model_kwargs": {"file_name": EMBED_ONNX_INT8_FILE}},
+}
+
+if EMBED_BACKEND not in BACKENDS:
+    raise RuntimeError(f"HEAVYLIFT_EMBED_BACKEND must be one of {sorted(BACKENDS)}, got {EMBED_BACKEND!r}")
+
+# Identifies the vectors embed_texts produces; stored vectors from another
+# model/backend must not be mixed with these.
+EMBEDDING_MODEL_ID = f"{MODEL_NAME}:{EMBED_BACKEND}"
+
+# The model (and torch/onnxruntime behind it) is loaded on first use, not at import.
+_model = None
+_model_lock = threading.Lock()
+
+# Canonical field embeddings (row i == REGISTRY.fields[i]), loaded from /
+# persisted to a .npy artifact
+_can_embeddings: Optional[np.ndarray] = None
+_can_lock = threading.Lock()
+
+
+def load_model(backend: str = EMBED_BACKEND):
+    """
+    Build a fresh SentenceTransformer for the given backend (no caching;
+    embed_texts uses the process-wide one from _get_model()).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(MODEL_NAME, **BACKENDS[backend])
+
+
+def _get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                t0 = time.perf_counter()
+                _model = load_model(EMBED_BACKEND)
+                print(f"[embeddings] loaded {MODEL_NAME} ({EMBED_BACKEND}) in {time.perf_counter() - t0:.2f}s")
+    return _model
+
+
+def is_warm() -> bool:
+    """
+    True once the model and the canonical matrix are both in memory.
+    """
+    return _model is not None and _can_embeddings is not None
+
+
+class _EmbeddingCache:
+    """
+    Content-addressed vector cache: key = sha1(model name + normalized text).
+    An in-memory LRU sits in front of a SQLite table of float32 BLOBs, so
+    repeated field texts, facts and resume chunks survive restarts.
+    """
+
+    def __init__(self, path, max_items: int, use_disk: bool):
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._max_items = max_items
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if use_disk:
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self._max_items:
+            self._mem.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for k in keys:
+                v = self._mem.get(k)
+                if v is not None:
+                    self._mem.move_to_end(k)
+                    found[k] = v
+            self.memory_hits += len(found)
+
+            rest = [k for k in keys if k not in found]
+            if rest and self._conn is not None:
+                for i in range(0, len(rest), 500):
+                    part = rest[i : i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                    for k, blob in rows:
+                        v = np.frombuffer(blob, dtype=np.float32)
+                        found[k] = v
+                        self._remember(k, v)
+                        self.disk_hits += 1
+
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray], seconds: float) -> None:
+        with self._lock:
+            for k, v in items.items():
+                self._remember(k, v)
+            self.encoded += len(items)
+            self.encode_seconds += seconds
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                    [(k, v.tobytes()) for k, v in items.items()],
+                )
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            per_text = (self.encode_seconds / self.encoded) if self.encoded else 0.0
+            return {
+                "memory_items": len(self._mem),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (hits / lookups) if lookups else 0.0,
+                "encoded_texts": self.encoded,
+                "encode_seconds": round(self.encode_seconds, 3),
+                # estimate: every hit would have cost the average encode time
+                "encode_seconds_saved": round(hits * per_text, 3),
+            }
+
+
+_cache = _EmbeddingCache(
+    DATA_DIR / "embedding_cache.sqlite3",
+    max_items=EMBED_CACHE_MEMORY_ITEMS,
+    use_disk=EMBED_CACHE_DISK,
+)
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def _cache_key(text: str) -> str:
+    # Backends agree closely but not bit-for-bit, so they don't share vectors
+    return hashlib.sha1(f"{EMBEDDING_MODEL_ID}\n{text}".encode("utf-8")).hexdigest()
 
 
 def embed_texts(texts: List[str]) -> np.ndarray:
-    return _model.encode(texts, normalize_embeddings=True)
+    """
+    Normalized embeddings for texts, shape (n, dim). Only texts missing from
+    the cache are encoded, in a single batch.
+    """
+    if not texts:
+        return _get_model().encode(texts, normalize_embeddings=True)
+
+    norm = [_normalize_text(t) for t in texts]
+    keys = [_cache_key(t) for t in norm]
+    found = _cache.get_many(list(dict.fromkeys(keys)))
+
+    missing: Dict[str, str] = {}
+    for k, t in zip(keys, norm):
+        if k not in found:
+            missing.setdefault(k, t)
+
+    if missing:
+        t0 = time.perf_counter()
+        vecs = _get_model().encode(list(missing.values()), normalize_embeddings=True)
+        elapsed = time.perf_counter() - t0
+        fresh = {k: np.asarray(v, dtype=np.float32) for k, v in zip(missing, vecs)}
+        _cache.put_many(fresh, elapsed)
+        found.update(fresh)
+
+    return np.stack([found[k] for k in keys])
+
+
+def embedding_cache_stats() -> dict:
+    return {"backend": EMBED_BACKEND, **_cache.stats()}
+
+
+def _canonical_artifact_path():
+    schema_hash = hashlib.sha1(json.dumps(REGISTRY.embedding_texts, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+    model_slug = f"{MODEL_NAME.replace('/', '__')}_{EMBED_BACKEND}"
+    return DATA_DIR / "canonical" / f"{model_slug}_{schema_hash}.npy"
+
+
+def canonical_embeddings() -> np.ndarray:
+    """
+    (n_canonical, dim) matrix index-aligned with REGISTRY.fields. Read from the on-disk
+    artifact when one exists for this schema + model; otherwise encoded once
+    and written for the next process.
+    """
+    global _can_embeddings
+    if _can_embeddings is None:
+        with _can_lock:
+            if _can_embeddings is None:
+                path = _canonical_artifact_path()
+                mat = None
+                if path.exists():
+                    mat = np.load(path)
+                    if mat.shape[0] != len(REGISTRY.fields):
+                        mat = None
+                if mat is None:
+                    mat = np.asarray(embed_texts(list(REGISTRY.embedding_texts)), dtype=np.float32)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_suffix(".tmp.npy")
+                    np.save(tmp, mat)
+                    os.replace(tmp, path)
+                _can_embeddings = mat
+    return _can_embeddings
+
+
+def warmup() -> None:
+    """
+    Load the model and canonical embeddings ahead of the first request.
+    """
+    _get_model()
+    canonical_embeddings()
 
 
 def classify_field_texts(
@@ -31,14 +257,14 @@ def classify_field_texts(
         return []
 
     field_embs = embed_texts(field_texts)  # shape: (n_fields, dim)
-    sims = np.matmul(field_embs, _can_embeddings.T)  # cosine sims
+    sims = np.matmul(field_embs, canonical_embeddings().T)  # cosine sims
 
     results: List[Tuple[str, float]] = []
     for i in range(len(field_texts)):
         row = sims[i]
         best_idx = int(np.argmax(row))
         best_score = float(row[best_idx])
-        key = _can_keys[best_idx]
+        key = REGISTRY.keys[best_idx]
         if best_score < min_confidence:
             key = "UNKNOWN"
         results.append((key, best_score))
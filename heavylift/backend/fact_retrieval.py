@@ -1,28 +1,80 @@
 # backend/fact_retrieval.py
 from __future__ import annotations
 
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import List
+
 import numpy as np
 
 from embeddings import embed_texts
+from rag_config import FACT_CACHE_MAX
 
+# Fact matrices keyed by a digest of the fact texts, so the same profile
+# version is embedded once and reused across requests.
+_fact_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_fact_lock = threading.Lock()
 
-def retrieve_top_facts(query: str, facts: List[dict], top_k: int = 10) -> List[dict]:
-    if not facts:
-        return []
 
-    fact_texts = [f"{f['label']}: {f['value']}" for f in facts]
-    vecs = embed_texts([query] + fact_texts).astype(np.float32)
+def _fact_texts(facts: List[dict]) -> List[str]:
+    return [f"{f['label']}: {f['value']}" for f in facts]
+
+
+def _fact_matrix(facts: List[dict]) -> np.ndarray:
+    texts = _fact_texts(facts)
+    digest = hashlib.sha1("\n".join(texts).encode("utf-8")).hexdigest()
+
+    with _fact_lock:
+        hit = _fact_cache.get(digest)
+        if hit is not None:
+            _fact_cache.move_to_end(digest)
+            return hit
+
+    mat = np.asarray(embed_texts(texts), dtype=np.float32)
+
+    with _fact_lock:
+        _fact_cache[digest] = mat
+        while len(_fact_cache) > FACT_CACHE_MAX:
+            _fact_cache.popitem(last=False)
+    return mat
 
-    q = vecs[0]
-    fv = vecs[1:]
+
+def retrieve_top_facts_batch(queries: List[str], facts: List[dict], top_k: int = 10) -> List[List[dict]]:
+    """
+    Top-k facts for every query at once: facts are embedded once (cached per
+    fact set), all queries go through a single embed_texts call, and scores
+    come from one (n_queries x n_facts) matrix product.
+    """
+    if not queries:
+        return []
+    if not facts or top_k <= 0:
+        return [[] for _ in queries]
+
+    fv = _fact_matrix(facts)
+    qv = np.asarray(embed_texts(list(queries)), dtype=np.float32)
 
     # cosine because embeddings are normalized
-    scores = fv @ q
-    idxs = np.argsort(-scores)[:top_k]
+    scores = qv @ fv.T
+
+    n_facts = fv.shape[0]
+    k = min(top_k, n_facts)
+    if k < n_facts:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(n_facts), (len(queries), 1))
 
-    out = []
-    for i in idxs:
-        f = facts[int(i)]
-        out.append({**f, "score": float(scores[int(i)])})
+    rows = np.arange(len(queries))[:, None]
+    order = np.argsort(-scores[rows, top], axis=1, kind="stable")
+    idxs = top[rows, order]
+
+    out: List[List[dict]] = []
+    for qi in range(len(queries)):
+        out.append(
+            [{**facts[int(i)], "score": float(scores[qi, int(i)])} for i in idxs[qi]]
+        )
     return out
+
+
+def retrieve_top_facts(query: str, facts: List[dict], top_k: int = 10) -> List[dict]:
+    return retrieve_top_facts_batch([query], facts, top_k=top_k)[0]
@@ -2,10 +2,13 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List, Literal, Optional
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
-from google import genai
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
+
+if TYPE_CHECKING:
+    from google import genai
 
 VERTEX_MODEL = os.getenv("HEAVYLIFT_GEMINI_MODEL", "gemini-2.5-flash")
 
@@ -16,9 +19,28 @@ class RagDecision(BaseModel):
     source_ref: Optional[str] = Field(default=None)  # profile.firstName | preferences.willingToRelocate | resume_chunk:123
     confidence: float = Field(ge=0.0, le=1.0)
     note: Optional[str] = None
+    # Set on placeholders made here rather than returned by the model
+    _synthesized: bool = PrivateAttr(default=False)
+
+
+def is_synthesized(decision: RagDecision) -> bool:
+    """
+    True for placeholder decisions (e.g. a question the batch response
+    left out); these must not be cached.
+    """
+    return decision._synthesized
+
+
+class RagBatchDecision(RagDecision):
+    question_id: str  # echoes the id of the question it answers
+
+
+_batch_adapter = TypeAdapter(List[RagBatchDecision])
+
 
+def _vertex_client() -> "genai.Client":
+    from google import genai
 
-def _vertex_client() -> genai.Client:
     # Force Vertex mode (you already set env vars, but this avoids API-key confusion)
     project = os.environ.get("GOOGLE_CLOUD_PROJECT")
     location = os.environ.get("GOOGLE_CLOUD_LOCATION") or "us-central1"
@@ -27,42 +49,108 @@ def _vertex_client() -> genai.Client:
     return genai.Client(vertexai=True, project=project, location=location)
 
 
-_client = _vertex_client()
+# Built on first use, so importing this module never needs GCP config.
+_client: Optional["genai.Client"] = None
+_client_lock = threading.Lock()
 
 
-def decide_value(
-    *,
-    field_question: str,
-    field_type: str,
-    options: List[str],
+def _get_client() -> "genai.Client":
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _vertex_client()
+    return _client
+
+
+def is_client_ready() -> bool:
+    return _client is not None
+
+
+def warmup() -> None:
+    _get_client()
+
+
+_BATCH_RULES = [
+    "Answer every question independently and return exactly one decision per question_id.",
+    "Use ONLY the candidates listed in that question's fact_keys and chunk_ids. Do not invent anything.",
+    "If the answer is not clearly supported by candidates, return source_type='unknown' and value=null.",
+    "If options are provided (radio/select), value must exactly match one option or be null.",
+]
+
+
+def _batch_request(
+    questions: List[Dict[str, Any]],
     candidate_facts: List[Dict[str, Any]],
     candidate_chunks: List[Dict[str, Any]],
-) -> RagDecision:
+) -> Dict[str, Any]:
     payload = {
-        "field": {
-            "question": field_question,
-            "field_type": field_type,
-            "options": options,
-        },
-        "rules": [
-            "Use ONLY the provided candidates. Do not invent anything.",
-            "If the answer is not clearly supported by candidates, return source_type='unknown' and value=null.",
-            "If options are provided (radio/select), value must exactly match one option or be null.",
+        "questions": [
+            {
+                "question_id": q["id"],
+                "question": q["question"],
+                "field_type": q["field_type"],
+                "options": q["options"],
+                "fact_keys": q["fact_keys"],
+                "chunk_ids": q["chunk_ids"],
+            }
+            for q in questions
         ],
+        "rules": _BATCH_RULES,
         "candidates": {
             "facts": candidate_facts,
             "resume_chunks": candidate_chunks,
         },
     }
-
-    resp = _client.models.generate_content(
-        model=VERTEX_MODEL,
-        contents=str(payload),
-        config={
+    return {
+        "model": VERTEX_MODEL,
+        "contents": str(payload),
+        "config": {
             "response_mime_type": "application/json",
-            "response_schema": RagDecision.model_json_schema(),
+            "response_schema": list[RagBatchDecision],
             "temperature": 0.2,
         },
-    )
+    }
+
+
+def _unknown_decision(note: str) -> RagDecision:
+    decision = RagDecision(value=None, source_type="unknown", source_ref=None, confidence=0.0, note=note)
+    decision._synthesized = True
+    return decision
+
+
+def _parse_batch(text: str, questions: List[Dict[str, Any]]) -> Dict[str, RagDecision]:
+    wanted = {q["id"] for q in questions}
+    out: Dict[str, RagDecision] = {}
+    for d in _batch_adapter.validate_json(text):
+        if d.question_id in wanted and d.question_id not in out:
+            out[d.question_id] = RagDecision(**d.model_dump(exclude={"question_id"}))
+
+    for qid in wanted - out.keys():
+        out[qid] = _unknown_decision("missing from batch response")
+    return out
+
+
+async def decide_values_batch_async(
+    *,
+    questions: List[Dict[str, Any]],
+    candidate_facts: List[Dict[str, Any]],
+    candidate_chunks: List[Dict[str, Any]],
+) -> Dict[str, RagDecision]:
+    """
+    Decide many fields in one structured-output call, awaiting the async
+    genai client so the event loop keeps serving other requests during the
+    Vertex round-trip.
+
+    questions: [{id, question, field_type, options, fact_keys, chunk_ids}]
+    candidate_facts / candidate_chunks are the deduped pools the questions
+    point into (by fact 'key' and resume 'chunk_id').
+
+    Returns {question_id: RagDecision}. Questions the model skipped come
+    back as unknown with confidence 0.
+    """
+    if not questions:
+        return {}
 
-    return RagDecision.model_validate_json(resp.text)
+    resp = await _get_client().aio.models.generate_content(**_batch_request(questions, candidate_facts, candidate_chunks))
+    return _parse_batch(resp.text, questions)
@@ -0,0 +1,163 @@
+# backend/hybrid_retrieval.py
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from pipeline import StageTimer
+from rag_config import (
+    HYBRID_CHUNK_TOKEN_BUDGET,
+    HYBRID_WEIGHT_BM25,
+    HYBRID_WEIGHT_VECTOR,
+    MAX_CHUNKS_TO_SEND,
+    RRF_K,
+)
+import resume_index
+import resume_search
+
+# Each retriever returns up to this many candidates per question before
+# fusion, so a chunk ranked low by one retriever can still be lifted by the other.
+_CANDIDATES_PER_RETRIEVER = 2
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(name: str, ms: float, questions: int, failed: bool) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(name, {"calls": 0, "questions": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        s["calls"] += 1
+        s["questions"] += questions
+        s["errors"] += int(failed)
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+
+
+def hybrid_retrieval_stats() -> dict:
+    with _stats_lock:
+        return {
+            name: {**s, "avg_ms": s["total_ms"] / s["calls"] if s["calls"] else 0.0}
+            for name, s in _stats.items()
+        }
+
+
+def _bm25_batch(db: Session, resume_id: int, questions: Sequence[str], top_k: int) -> List[List[dict]]:
+    return [resume_search.search_resume(db, resume_id, q, top_k=top_k) for q in questions]
+
+
+def _vector_batch(db: Session, resume_id: int, questions: Sequence[str], top_k: int) -> List[List[dict]]:
+    return resume_index.search_resume_batch(resume_id, questions, top_k, db=db)
+
+
+def _run_retriever(
+    name: str,
+    search_batch: Callable[[Session, int, Sequence[str], int], List[List[dict]]],
+    resume_id: int,
+    questions: Sequence[str],
+    top_k: int,
+) -> List[List[dict]]:
+    """
+    One retriever over every question, in a worker thread with its own DB
+    session. A failure only costs this retriever's results.
+    """
+    t0 = time.perf_counter()
+    failed = False
+    db = SessionLocal()
+    try:
+        return search_batch(db, resume_id, questions, top_k)
+    except Exception as e:
+        failed = True
+        print(f"[hybrid retrieval] {name} failed:", e)
+        return [[] for _ in questions]
+    finally:
+        db.close()
+        _record(name, (time.perf_counter() - t0) * 1000, len(questions), failed)
+
+
+def _approx_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting English prose
+    return max(1, len(text) // 4)
+
+
+def fuse(
+    ranked_lists: Sequence[tuple],
+    top_k: int = MAX_CHUNKS_TO_SEND,
+    token_budget: int = HYBRID_CHUNK_TOKEN_BUDGET,
+) -> List[dict]:
+    """
+    Weighted reciprocal rank fusion of [(weight, [chunk, ...]), ...] for one
+    question. Chunks are deduplicated by chunk_id and by identical text,
+    then taken best-first until top_k or the token budget is reached (the
+    best chunk is always kept). Returns [{chunk_id, chunk_index, text, score}]
+    with the fused score.
+    """
+    fused: Dict[object, dict] = {}
+    for weight, hits in ranked_lists:
+        for rank, c in enumerate(hits, start=1):
+            entry = fused.get(c["chunk_id"])
+            if entry is None:
+                entry = fused[c["chunk_id"]] = {
+                    "chunk_id": c["chunk_id"],
+                    "chunk_index": c.get("chunk_index"),
+                    "text": c["text"],
+                    "score": 0.0,
+                }
+            entry["score"] += weight / (RRF_K + rank)
+
+    out: List[dict] = []
+    seen_texts = set()
+    used = 0
+    for c in sorted(fused.values(), key=lambda c: c["score"], reverse=True):
+        if len(out) >= top_k:
+            break
+        text = c["text"] or ""
+        if text in seen_texts:
+            continue
+        cost = _approx_tokens(text)
+        if out and used + cost > token_budget:
+            continue
+        seen_texts.add(text)
+        used += cost
+        out.append(c)
+    return out
+
+
+async def retrieve_resume_chunks(
+    resume_id: Optional[int],
+    questions: Sequence[str],
+    timer: Optional[StageTimer] = None,
+    top_k: int = MAX_CHUNKS_TO_SEND,
+) -> List[List[dict]]:
+    """
+    Resume chunks for a batch of field questions: BM25 and FAISS run
+    concurrently (each over the whole batch, off the event loop; FAISS as
+    one embedding call and one index search) and are fused per question.
+    Each retriever's wall time goes into `timer` as retrieval_bm25 /
+    retrieval_vector.
+    """
+    if not resume_id or not questions:
+        return [[] for _ in questions]
+
+    retrievers = [
+        ("bm25", HYBRID_WEIGHT_BM25, _bm25_batch),
+        ("vector", HYBRID_WEIGHT_VECTOR, _vector_batch),
+    ]
+    retrievers = [r for r in retrievers if r[1] > 0]
+    depth = top_k * _CANDIDATES_PER_RETRIEVER
+
+    async def run(name: str, search_batch: Callable) -> List[List[dict]]:
+        aw = asyncio.to_thread(_run_retriever, name, search_batch, resume_id, questions, depth)
+        if timer is None:
+            return await aw
+        return await timer.run(f"retrieval_{name}", aw)
+
+    results = await asyncio.gather(*(run(name, search_batch) for name, _, search_batch in retrievers))
+    return [
+        fuse([(weight, per_question[i]) for (_, weight, _), per_question in zip(retrievers, results)], top_k=top_k)
+        for i in range(len(questions))
+    ]
@@ -0,0 +1,336 @@
+# backend/index_jobs.py
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Select, or_, select, update
+
+from db import SessionLocal, utcnow
+from db_models import ResumeIndexJob
+from rag_config import (
+    INDEX_JOB_HEARTBEAT_SECONDS,
+    INDEX_JOB_STALE_SECONDS,
+    INDEX_JOB_TIMEOUT_SECONDS,
+    INDEX_WORKERS,
+)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Created on first use; "spawn" so workers don't inherit the server's
+# threads (warmup, report writer) or a half-initialized torch.
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Server-side sweep for abandoned running jobs (see _reap_stale)
+_reaper: Optional[threading.Thread] = None
+_reaper_stop = threading.Event()
+
+
+def _get_executor(replace_broken: Optional[ProcessPoolExecutor] = None) -> ProcessPoolExecutor:
+    global _executor
+    if replace_broken is not None:
+        with _executor_lock:
+            if _executor is replace_broken:
+                _executor = None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=INDEX_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _ms(start: datetime, end: datetime) -> float:
+    # SQLite hands DateTime(timezone=True) back naive (it's stored as UTC)
+    return (end.replace(tzinfo=None) - start.replace(tzinfo=None)).total_seconds() * 1000
+
+
+@contextmanager
+def _heartbeat(job_id: int, attempt: int) -> Iterator[None]:
+    """
+    Refresh the job's heartbeat_at from a side thread while the build runs.
+    It stops once the job has run for INDEX_JOB_TIMEOUT_SECONDS, so a build
+    hung in native code goes stale and is reaped by the server.
+    """
+    stop = threading.Event()
+
+    def beat() -> None:
+        deadline = utcnow() + timedelta(seconds=INDEX_JOB_TIMEOUT_SECONDS)
+        while not stop.wait(INDEX_JOB_HEARTBEAT_SECONDS) and utcnow() < deadline:
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(ResumeIndexJob)
+                    .where(ResumeIndexJob.id == job_id)
+                    .where(ResumeIndexJob.attempts == attempt)
+                    .where(ResumeIndexJob.status == "running")
+                    .values(heartbeat_at=utcnow())
+                )
+                db.commit()
+            except Exception as e:
+                print(f"[index-jobs] job {job_id} heartbeat failed:", e)
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"heavylift-index-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+@contextmanager
+def _time_limit(seconds: float) -> Iterator[None]:
+    # SIGALRM interrupts the build in the worker's main thread (where the
+    # pool runs tasks); without it (Windows) only the server-side reap applies.
+    if seconds <= 0 or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expired(signum, frame):
+        raise TimeoutError(f"indexing ran longer than {seconds:.0f} s")
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _run_job(job_id: int) -> str:
+    """
+    Runs in a pool worker: claim the job, build the index (heartbeating,
+    within INDEX_JOB_TIMEOUT_SECONDS), record the outcome. The model and
+    FAISS are loaded once per worker process.
+    """
+    from resume_index import build_index_for_resume
+
+    db = SessionLocal()
+    try:
+        # Atomic queued -> running; a job submitted twice (several server
+        # processes, --reload) is only run by the worker that claims it.
+        started = utcnow()
+        claimed = db.execute(
+            update(ResumeIndexJob)
+            .where(ResumeIndexJob.id == job_id)
+            .where(ResumeIndexJob.status == "queued")
+            .values(
+                status="running",
+                owner_pid=os.getpid(),
+                started_at=started,
+                heartbeat_at=started,
+                attempts=ResumeIndexJob.attempts + 1,
+                error=None,
+            )
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return "skipped"
+
+        job = db.get(ResumeIndexJob, job_id)
+        resume_id, pdf_path, attempt = job.resume_id, job.pdf_path, job.attempts
+        job.queue_wait_ms = _ms(job.queued_at, started)
+        db.commit()
+
+        try:
+            with _heartbeat(job_id, attempt), _time_limit(INDEX_JOB_TIMEOUT_SECONDS):
+                build_index_for_resume(db, resume_id, pdf_path)
+            status, error = "done", None
+        except Exception as e:
+            db.rollback()
+            status, error = "failed", f"{type(e).__name__}: {e}"
+
+        # Only if this attempt still owns the job (it was not reaped meanwhile)
+        finished = utcnow()
+        duration_ms = _ms(started, finished)
+        db.execute(
+            update(ResumeIndexJob)
+            .where(ResumeIndexJob.id == job_id)
+            .where(ResumeIndexJob.attempts == attempt)
+            .where(ResumeIndexJob.status == "running")
+            .values(status=status, error=error, finished_at=finished, duration_ms=duration_ms)
+        )
+        db.commit()
+        print(f"[index-jobs] resume {resume_id}: {status} in {duration_ms:.0f} ms" + (f" ({error})" if error else ""))
+        return status
+    finally:
+        db.close()
+
+
+def _on_done(job_id: int, fut: Future) -> None:
+    # The worker records normal outcomes itself; this only covers jobs it
+    # never finished recording (e.g. the worker process died).
+    if fut.cancelled() or fut.exception() is None:
+        return
+    exc = fut.exception()
+    print(f"[index-jobs] job {job_id} crashed:", exc)
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(ResumeIndexJob)
+            .where(ResumeIndexJob.id == job_id)
+            .where(ResumeIndexJob.status.in_(ACTIVE_STATUSES))
+            .values(status="failed", error=f"{type(exc).__name__}: {exc}", finished_at=utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def submit_job(job_id: int) -> None:
+    """
+    Hand an already-committed queued job to the process pool.
+    """
+    executor = _get_executor()
+    try:
+        fut = executor.submit(_run_job, job_id)
+    except BrokenProcessPool:
+        # A dead worker poisons the whole pool; start a fresh one
+        fut = _get_executor(replace_broken=executor).submit(_run_job, job_id)
+    fut.add_done_callback(partial(_on_done, job_id))
+
+
+def _reap_stale() -> List[int]:
+    """
+    Running jobs whose heartbeat is older than INDEX_JOB_STALE_SECONDS lost
+    their worker or server: those that ran past INDEX_JOB_TIMEOUT_SECONDS
+    are marked failed, the rest go back to queued. Returns the requeued ids.
+    """
+    now = utcnow()
+    stale = or_(
+        ResumeIndexJob.heartbeat_at.is_(None),
+        ResumeIndexJob.heartbeat_at < now - timedelta(seconds=INDEX_JOB_STALE_SECONDS),
+    )
+    db = SessionLocal()
+    try:
+        timed_out = db.execute(
+            update(ResumeIndexJob)
+            .where(ResumeIndexJob.status == "running")
+            .where(stale)
+            .where(ResumeIndexJob.started_at < now - timedelta(seconds=INDEX_JOB_TIMEOUT_SECONDS))
+            .values(
+                status="failed",
+                error=f"TimeoutError: no heartbeat, running longer than {INDEX_JOB_TIMEOUT_SECONDS:.0f} s",
+                finished_at=now,
+            )
+        ).rowcount
+        ids = db.scalars(
+            update(ResumeIndexJob)
+            .where(ResumeIndexJob.status == "running")
+            .where(stale)
+            .values(status="queued", owner_pid=None, heartbeat_at=None)
+            .returning(ResumeIndexJob.id)
+        ).all()
+        db.commit()
+    finally:
+        db.close()
+    if timed_out:
+        print(f"[index-jobs] {timed_out} abandoned job(s) timed out")
+    return list(ids)
+
+
+def _run_reaper() -> None:
+    while not _reaper_stop.wait(INDEX_JOB_STALE_SECONDS):
+        try:
+            ids = _reap_stale()
+        except Exception as e:
+            print("[index-jobs] reap failed:", e)
+            continue
+        for job_id in ids:
+            submit_job(job_id)
+        if ids:
+            print(f"[index-jobs] requeued {len(ids)} abandoned job(s)")
+
+
+def requeue_unfinished() -> int:
+    """
+    On startup: requeue running jobs whose heartbeat went stale (their
+    server or worker is gone), submit every queued job, and start the
+    periodic sweep for jobs abandoned later. Jobs another live server
+    process is running keep heartbeating and are left alone; a queued job
+    submitted by more than one process runs once (see the claim in
+    _run_job).
+    """
+    global _reaper
+    _reap_stale()
+    db = SessionLocal()
+    try:
+        ids = db.scalars(select(ResumeIndexJob.id).where(ResumeIndexJob.status == "queued")).all()
+    finally:
+        db.close()
+    for job_id in ids:
+        submit_job(job_id)
+    if ids:
+        print(f"[index-jobs] requeued {len(ids)} unfinished job(s)")
+
+    if _reaper is None:
+        _reaper_stop.clear()
+        _reaper = threading.Thread(target=_run_reaper, name="heavylift-index-reaper", daemon=True)
+        _reaper.start()
+    return len(ids)
+
+
+def is_active(job: Optional[ResumeIndexJob]) -> bool:
+    """
+    Whether the job is still expected to finish: queued, or running with a
+    fresh heartbeat (an abandoned job is not waited on until it is reaped).
+    """
+    if job is None or job.status not in ACTIVE_STATUSES:
+        return False
+    if job.status == "queued":
+        return True
+    return job.heartbeat_at is not None and _ms(job.heartbeat_at, utcnow()) < INDEX_JOB_STALE_SECONDS * 1000
+
+
+def shutdown() -> None:
+    global _reaper
+    _reaper_stop.set()
+    _reaper = None
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def latest_job_query(resume_id: int) -> Select:
+    """
+    Most recent job for a resume; works with both sync and async sessions.
+    """
+    return (
+        select(ResumeIndexJob)
+        .where(ResumeIndexJob.resume_id == resume_id)
+        .order_by(ResumeIndexJob.id.desc())
+        .limit(1)
+    )
+
+
+def job_status(resume_id: int, job: Optional[ResumeIndexJob]) -> dict:
+    if job is None:
+        return {"resume_id": resume_id, "status": "none"}
+    return {
+        "resume_id": resume_id,
+        "job_id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "attempts": job.attempts,
+        "queued_at": job.queued_at,
+        "started_at": job.started_at,
+        "heartbeat_at": job.heartbeat_at,
+        "finished_at": job.finished_at,
+        "queue_wait_ms": job.queue_wait_ms,
+        "duration_ms": job.duration_ms,
+    }
+
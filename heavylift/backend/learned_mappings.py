@@ -0,0 +1,72 @@
+# backend/learned_mappings.py
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from db import utcnow
+from db_models import FieldKeyMapping
+
+
+def lookup_keys(db: Session, domain: str, fingerprints: List[str]) -> Dict[str, Tuple[str, float]]:
+    """
+    One IN query for all fingerprints of a form.
+    Returns {fingerprint: (canonical_key, confidence)}.
+    """
+    if not fingerprints:
+        return {}
+
+    rows = db.execute(
+        select(FieldKeyMapping.fingerprint, FieldKeyMapping.canonical_key, FieldKeyMapping.confidence)
+        .where(FieldKeyMapping.domain == domain)
+        .where(FieldKeyMapping.fingerprint.in_(set(fingerprints)))
+    ).all()
+    found = {fp: (key, float(conf)) for fp, key, conf in rows}
+
+    if found:
+        db.execute(
+            update(FieldKeyMapping)
+            .where(FieldKeyMapping.domain == domain)
+            .where(FieldKeyMapping.fingerprint.in_(list(found)))
+            .values(hits=FieldKeyMapping.hits + 1)
+        )
+        db.commit()
+    return found
+
+
+def save_keys(db: Session, domain: str, learned: Dict[str, Tuple[str, float]]) -> None:
+    """
+    Upsert {fingerprint: (canonical_key, confidence)} for a domain.
+    """
+    if not learned:
+        return
+
+    now = utcnow()
+    stmt = sqlite_insert(FieldKeyMapping)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FieldKeyMapping.domain, FieldKeyMapping.fingerprint],
+        set_={
+            "canonical_key": stmt.excluded.canonical_key,
+            "confidence": stmt.excluded.confidence,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(
+        stmt,
+        [
+            {
+                "domain": domain,
+                "fingerprint": fp,
+                "canonical_key": key,
+                "confidence": conf,
+                "hits": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for fp, (key, conf) in learned.items()
+        ],
+    )
+    db.commit()
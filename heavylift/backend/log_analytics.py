@@ -0,0 +1,375 @@
+# backend/log_analytics.py
+"""
+Compacts reports.jsonl / rag_traces.jsonl (and their rotated .jsonl.gz
+archives) into small indexed SQLite rollups, partitioned by day and
+domain, so aggregates never rescan the raw logs.
+
+    python log_analytics.py ingest
+    python log_analytics.py unknown-rate [--since 2026-01-01] [--until ...] [--domain jobs.lever.co]
+    python log_analytics.py confidence [--since ...] [--domain ...]
+    python log_analytics.py unresolved [--domain ...] [--limit 20]
+
+Ingestion is incremental: each log file is identified by a digest of its
+first line (which survives rotation into an archive) and only the bytes
+after the last ingested offset are read.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import sqlite3
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from db import DATA_DIR
+from rag_config import MIN_CONFIDENCE_TO_AUTOFILL, MIN_CONFIDENCE_TO_RETURN_VALUE
+from reporting import RAG_TRACE_PATH, REPORTS_PATH
+
+ANALYTICS_DB_PATH = DATA_DIR / "analytics.sqlite3"
+
+# Gemini confidence histogram resolution
+CONFIDENCE_BUCKETS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_state (
+    ident TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    byte_offset INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    bad_lines INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS report_daily (
+    day TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    canonical_key TEXT NOT NULL,
+    fields INTEGER NOT NULL,
+    unknown INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (day, domain, canonical_key)
+);
+CREATE INDEX IF NOT EXISTS ix_report_daily_domain ON report_daily (domain, day);
+CREATE TABLE IF NOT EXISTS trace_daily (
+    day TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    canonical_key TEXT NOT NULL,
+    decisions INTEGER NOT NULL,
+    unknown INTEGER NOT NULL,
+    cache_hits INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (day, domain, canonical_key)
+);
+CREATE INDEX IF NOT EXISTS ix_trace_daily_domain ON trace_daily (domain, day);
+CREATE TABLE IF NOT EXISTS trace_confidence (
+    day TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (day, domain, bucket)
+);
+CREATE INDEX IF NOT EXISTS ix_trace_confidence_domain ON trace_confidence (domain, day);
+CREATE TABLE IF NOT EXISTS unresolved_questions (
+    day TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    question TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (day, domain, question)
+);
+CREATE INDEX IF NOT EXISTS ix_unresolved_domain ON unresolved_questions (domain, day);
+"""
+
+
+def connect(path: Path = ANALYTICS_DB_PATH) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+# ---------- Ingestion ----------
+
+
+def _open_binary(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else path.open("rb")
+
+
+def _identity(path: Path) -> Optional[str]:
+    with _open_binary(path) as f:
+        first = f.readline()
+    if not first.endswith(b"\n"):
+        return None
+    return hashlib.sha1(first).hexdigest()
+
+
+def _bucket(confidence: float) -> int:
+    return min(max(int(confidence * CONFIDENCE_BUCKETS), 0), CONFIDENCE_BUCKETS - 1)
+
+
+def _report_domain(job_url: Optional[str]) -> str:
+    try:
+        return (urlparse(job_url or "").netloc or "unknown").lower()
+    except Exception:
+        return "unknown"
+
+
+class _Rollup:
+    """
+    In-memory deltas for one ingest pass, flushed as additive upserts.
+    """
+
+    def __init__(self) -> None:
+        # (day, domain, key) -> [fields, unknown, confidence_sum]
+        self.report_daily: Dict[Tuple[str, str, str], List[float]] = {}
+        # (day, domain, key) -> [decisions, unknown, cache_hits, confidence_sum]
+        self.trace_daily: Dict[Tuple[str, str, str], List[float]] = {}
+        self.trace_confidence: Counter = Counter()
+        self.unresolved: Counter = Counter()
+
+    def add_report(self, rec: dict) -> None:
+        day = datetime.fromtimestamp(float(rec["timestamp"]), tz=timezone.utc).date().isoformat()
+        domain = _report_domain(rec.get("job_url"))
+        for f in rec.get("fields") or []:
+            key = f.get("canonical_key") or "UNKNOWN"
+            unknown = f.get("source") == "none" or f.get("suggested_value") is None
+            acc = self.report_daily.setdefault((day, domain, key), [0, 0, 0.0])
+            acc[0] += 1
+            acc[1] += int(unknown)
+            acc[2] += float(f.get("confidence") or 0.0)
+
+    def add_trace(self, rec: dict) -> None:
+        day = str(rec["ts"])[:10]
+        domain = rec.get("domain") or "unknown"
+        key = rec.get("canonical_key") or "UNKNOWN"
+        decision = rec.get("gemini_decision") or {}
+        confidence = float(decision.get("confidence") or 0.0)
+        # Same thresholds generate-answers applies before returning a value
+        unknown = (
+            decision.get("value") is None
+            or confidence < MIN_CONFIDENCE_TO_RETURN_VALUE
+            or confidence < MIN_CONFIDENCE_TO_AUTOFILL
+        )
+
+        acc = self.trace_daily.setdefault((day, domain, key), [0, 0, 0, 0.0])
+        acc[0] += 1
+        acc[1] += int(unknown)
+        acc[2] += int(bool(rec.get("cache_hit")))
+        acc[3] += confidence
+        self.trace_confidence[(day, domain, _bucket(confidence))] += 1
+        if unknown and rec.get("field_question"):
+            self.unresolved[(day, domain, rec["field_question"])] += 1
+
+    def flush(self, conn: sqlite3.Connection) -> None:
+        conn.executemany(
+            """INSERT INTO report_daily VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (day, domain, canonical_key) DO UPDATE SET
+                 fields = fields + excluded.fields,
+                 unknown = unknown + excluded.unknown,
+                 confidence_sum = confidence_sum + excluded.confidence_sum""",
+            [(*k, *v) for k, v in self.report_daily.items()],
+        )
+        conn.executemany(
+            """INSERT INTO trace_daily VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (day, domain, canonical_key) DO UPDATE SET
+                 decisions = decisions + excluded.decisions,
+                 unknown = unknown + excluded.unknown,
+                 cache_hits = cache_hits + excluded.cache_hits,
+                 confidence_sum = confidence_sum + excluded.confidence_sum""",
+            [(*k, *v) for k, v in self.trace_daily.items()],
+        )
+        conn.executemany(
+            """INSERT INTO trace_confidence VALUES (?, ?, ?, ?)
+               ON CONFLICT (day, domain, bucket) DO UPDATE SET n = n + excluded.n""",
+            [(*k, n) for k, n in self.trace_confidence.items()],
+        )
+        conn.executemany(
+            """INSERT INTO unresolved_questions VALUES (?, ?, ?, ?)
+               ON CONFLICT (day, domain, question) DO UPDATE SET n = n + excluded.n""",
+            [(*k, n) for k, n in self.unresolved.items()],
+        )
+
+
+def _ingest_file(conn: sqlite3.Connection, path: Path, kind: str) -> int:
+    ident = _identity(path)
+    if ident is None:
+        return 0
+
+    row = conn.execute("SELECT byte_offset, lines, bad_lines, complete FROM ingest_state WHERE ident = ?", (ident,)).fetchone()
+    offset, lines, bad, complete = row if row else (0, 0, 0, 0)
+    if complete:
+        return 0
+
+    rollup = _Rollup()
+    add = rollup.add_report if kind == "reports" else rollup.add_trace
+    new_lines = 0
+    with _open_binary(path) as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # the writer is mid-line; pick it up next time
+            offset += len(raw)
+            new_lines += 1
+            try:
+                add(json.loads(raw))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                bad += 1
+
+    if not new_lines and row:
+        return 0
+
+    with conn:
+        rollup.flush(conn)
+        conn.execute(
+            """INSERT INTO ingest_state (ident, kind, path, byte_offset, lines, bad_lines, complete)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (ident) DO UPDATE SET path = excluded.path, byte_offset = excluded.byte_offset,
+                 lines = excluded.lines, bad_lines = excluded.bad_lines, complete = excluded.complete""",
+            # Archives never change again once fully read
+            (ident, kind, str(path), offset, lines + new_lines, bad, int(path.suffix == ".gz")),
+        )
+    return new_lines
+
+
+def ingest_logs(conn: Optional[sqlite3.Connection] = None) -> dict:
+    """
+    Fold any new report / trace lines (active files and archives) into the
+    rollup tables. Returns new lines per stream.
+    """
+    own = conn is None
+    conn = conn or connect()
+    try:
+        out: Dict[str, int] = {}
+        for kind, active in (("reports", REPORTS_PATH), ("rag_traces", RAG_TRACE_PATH)):
+            files = sorted(active.parent.glob(f"{active.stem}.*.jsonl.gz"))
+            if active.exists():
+                files.append(active)
+            out[kind] = sum(_ingest_file(conn, p, kind) for p in files)
+        return out
+    finally:
+        if own:
+            conn.close()
+
+
+# ---------- Queries ----------
+
+
+def _where(since: Optional[str], until: Optional[str], domain: Optional[str]) -> Tuple[str, list]:
+    clauses, params = [], []
+    if since:
+        clauses.append("day >= ?")
+        params.append(since)
+    if until:
+        clauses.append("day <= ?")
+        params.append(until)
+    if domain:
+        clauses.append("domain = ?")
+        params.append(domain)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def unknown_rate(conn: sqlite3.Connection, since=None, until=None, domain=None) -> dict:
+    """
+    Per canonical key: share of scanned fields left unknown (scan reports)
+    and share of Gemini decisions that came back unusable (RAG traces).
+    """
+    where, params = _where(since, until, domain)
+    scanned = [
+        {"canonical_key": k, "fields": n, "unknown": u, "unknown_rate": u / n, "avg_confidence": c / n}
+        for k, n, u, c in conn.execute(
+            f"""SELECT canonical_key, SUM(fields), SUM(unknown), SUM(confidence_sum)
+                FROM report_daily{where} GROUP BY canonical_key ORDER BY SUM(unknown) DESC""",
+            params,
+        )
+    ]
+    rag = [
+        {"canonical_key": k, "decisions": n, "unknown": u, "unknown_rate": u / n, "cache_hits": h, "avg_confidence": c / n}
+        for k, n, u, h, c in conn.execute(
+            f"""SELECT canonical_key, SUM(decisions), SUM(unknown), SUM(cache_hits), SUM(confidence_sum)
+                FROM trace_daily{where} GROUP BY canonical_key ORDER BY SUM(unknown) DESC""",
+            params,
+        )
+    ]
+    return {"scan_reports": scanned, "rag_decisions": rag}
+
+
+def confidence_histogram(conn: sqlite3.Connection, since=None, until=None, domain=None) -> List[dict]:
+    where, params = _where(since, until, domain)
+    counts = dict(conn.execute(f"SELECT bucket, SUM(n) FROM trace_confidence{where} GROUP BY bucket", params))
+    width = 1.0 / CONFIDENCE_BUCKETS
+    return [
+        {"from": round(b * width, 3), "to": round((b + 1) * width, 3), "decisions": int(counts.get(b, 0))}
+        for b in range(CONFIDENCE_BUCKETS)
+    ]
+
+
+def top_unresolved(conn: sqlite3.Connection, since=None, until=None, domain=None, limit: int = 20) -> Dict[str, List[dict]]:
+    """
+    Most frequent questions Gemini could not answer, top `limit` per domain.
+    """
+    where, params = _where(since, until, domain)
+    rows = conn.execute(
+        f"""SELECT domain, question, n FROM (
+                SELECT domain, question, SUM(n) AS n,
+                       ROW_NUMBER() OVER (PARTITION BY domain ORDER BY SUM(n) DESC, question) AS rank
+                FROM unresolved_questions{where}
+                GROUP BY domain, question
+            ) WHERE rank <= ? ORDER BY domain, n DESC, question""",
+        [*params, limit],
+    )
+    out: Dict[str, List[dict]] = {}
+    for d, question, n in rows:
+        out.setdefault(d, []).append({"question": question, "count": n})
+    return out
+
+
+def summary(since=None, until=None, domain=None, limit: int = 20) -> dict:
+    conn = connect()
+    try:
+        return {
+            "unknown_rate": unknown_rate(conn, since, until, domain),
+            "confidence_histogram": confidence_histogram(conn, since, until, domain),
+            "top_unresolved": top_unresolved(conn, since, until, domain, limit),
+        }
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["ingest", "unknown-rate", "confidence", "unresolved"])
+    ap.add_argument("--since", help="first day, YYYY-MM-DD (UTC)")
+    ap.add_argument("--until", help="last day, YYYY-MM-DD (UTC)")
+    ap.add_argument("--domain")
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--no-ingest", action="store_true", help="query without folding in new log lines first")
+    args = ap.parse_args()
+
+    conn = connect()
+    try:
+        if args.command == "ingest" or not args.no_ingest:
+            added = ingest_logs(conn)
+            if args.command == "ingest":
+                print(json.dumps(added))
+                return 0
+
+        if args.command == "unknown-rate":
+            result = unknown_rate(conn, args.since, args.until, args.domain)
+        elif args.command == "confidence":
+            result = confidence_histogram(conn, args.since, args.until, args.domain)
+        else:
+            result = top_unresolved(conn, args.since, args.until, args.domain, args.limit)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
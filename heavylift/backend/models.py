@@ -18,6 +18,7 @@ class FieldInput(BaseModel):
 
 class ClassifyFieldsRequest(BaseModel):
     fields: List[FieldInput]
+    domain: Optional[str] = None  # enables per-domain learned mappings
 
 
 class ClassifiedField(BaseModel):
@@ -31,6 +32,7 @@ class ClassifiedField(BaseModel):
 
 class ClassifyFieldsResponse(BaseModel):
     results: List[ClassifiedField]
+    stage_counts: Optional[Dict[str, int]] = None   # fields resolved per stage (html_type/rules/learned/embedding)
 
 
 # ---------- New: live-report + generate-answers models ----------
@@ -0,0 +1,57 @@
+# backend/pipeline.py
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Dict, Iterator, Optional, TypeVar
+
+from models import ClassifiedField, FieldAnswer, FieldInput
+
+T = TypeVar("T")
+
+
+@dataclass
+class PendingField:
+    """
+    One input field on its way through /generate-answers. `slot` is its
+    position in the response; a stage that resolves it sets `answer`, and
+    later stages only see fields whose answer is still None.
+    """
+
+    slot: int
+    field: FieldInput
+    fp: str
+    oh: str
+    question: str
+    cf: Optional[ClassifiedField] = None
+    answer: Optional[FieldAnswer] = None
+
+
+class StageTimer:
+    """
+    Wall time per pipeline stage, rendered as a Server-Timing header.
+    Stages that run concurrently are each timed on their own, so their
+    durations can add up to more than the request took.
+    """
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self._ms: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._ms[name] = self._ms.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    async def run(self, name: str, aw: Awaitable[T]) -> T:
+        with self.stage(name):
+            return await aw
+
+    def header(self) -> str:
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self._ms.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self._t0) * 1000:.1f}")
+        return ", ".join(parts)
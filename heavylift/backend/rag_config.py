@@ -1,4 +1,5 @@
 # backend/rag_config.py
+import os
 
 # Gemini threshold: safe mode
 # For now you asked: 0.55–0.60 returns null, so MIN_RETURN == MIN_AUTOFILL.
@@ -15,3 +16,99 @@ MAX_CHUNKS_TO_SEND = 8
 # Resume chunking
 RESUME_CHUNK_SIZE = 900
 RESUME_CHUNK_OVERLAP = 150
+
+# Hard path concurrency: Gemini batches run as asyncio tasks, at most this
+# many in flight at once across all requests in the server process.
+RAG_MAX_CONCURRENCY = int(os.getenv("HEAVYLIFT_RAG_CONCURRENCY", "4"))
+
+# Max distinct questions per batched Gemini call
+RAG_BATCH_SIZE = int(os.getenv("HEAVYLIFT_RAG_BATCH_SIZE", "20"))
+
+# Gemini decision cache (SQLite): entries older than the TTL are ignored,
+# and the least recently used are evicted beyond the max size.
+DECISION_CACHE_TTL_SECONDS = int(os.getenv("HEAVYLIFT_DECISION_CACHE_TTL", str(7 * 24 * 3600)))
+DECISION_CACHE_MAX_ENTRIES = int(os.getenv("HEAVYLIFT_DECISION_CACHE_MAX", "5000"))
+
+# In-process FAISS index cache: at most this many resume indexes stay loaded;
+# index files at least this big are memory-mapped instead of read into RAM.
+FAISS_CACHE_MAX_INDEXES = int(os.getenv("HEAVYLIFT_FAISS_CACHE_MAX", "16"))
+FAISS_MMAP_MIN_BYTES = int(os.getenv("HEAVYLIFT_FAISS_MMAP_MIN_BYTES", str(8 * 1024 * 1024)))
+
+# Resume keyword search: BM25 parameters and how many per-resume inverted
+# indexes stay loaded in memory.
+BM25_K1 = float(os.getenv("HEAVYLIFT_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("HEAVYLIFT_BM25_B", "0.75"))
+BM25_CACHE_MAX_INDEXES = int(os.getenv("HEAVYLIFT_BM25_CACHE_MAX", "64"))
+
+# Hybrid resume retrieval (hard path): BM25 and FAISS results are fused
+# with weighted reciprocal rank fusion, w / (RRF_K + rank); a weight of 0
+# turns that retriever off. Each field gets at most MAX_CHUNKS_TO_SEND
+# distinct chunks within a budget of ~HYBRID_CHUNK_TOKEN_BUDGET tokens.
+RRF_K = int(os.getenv("HEAVYLIFT_RRF_K", "60"))
+HYBRID_WEIGHT_BM25 = float(os.getenv("HEAVYLIFT_HYBRID_WEIGHT_BM25", "1.0"))
+HYBRID_WEIGHT_VECTOR = float(os.getenv("HEAVYLIFT_HYBRID_WEIGHT_VECTOR", "1.0"))
+HYBRID_CHUNK_TOKEN_BUDGET = int(os.getenv("HEAVYLIFT_HYBRID_CHUNK_TOKEN_BUDGET", "1500"))
+
+# Fact retrieval: embedded profile-fact matrices kept in memory, one per
+# distinct set of fact texts (LRU).
+FACT_CACHE_MAX = int(os.getenv("HEAVYLIFT_FACT_CACHE_MAX", "32"))
+
+# Embedding cache: in-memory LRU (vectors) in front of a SQLite store in DATA_DIR
+EMBED_CACHE_MEMORY_ITEMS = int(os.getenv("HEAVYLIFT_EMBED_CACHE_ITEMS", "20000"))
+EMBED_CACHE_DISK = os.getenv("HEAVYLIFT_EMBED_CACHE_DISK", "1") == "1"
+
+# Load the embedding model / canonical matrix / Gemini client in a background
+# thread when the server starts (POST /warmup does the same on demand).
+WARMUP_ON_STARTUP = os.getenv("HEAVYLIFT_WARMUP_ON_STARTUP", "1") == "1"
+
+# Embedding backend: "torch" (PyTorch fp32), "onnx" (ONNX Runtime fp32) or
+# "onnx-int8" (dynamically quantized MiniLM). ONNX backends need
+# sentence-transformers>=3.2 with the onnx extra (optimum + onnxruntime).
+EMBED_BACKEND = os.getenv("HEAVYLIFT_EMBED_BACKEND", "torch")
+# Quantized weights shipped in the model repo; pick the variant for your CPU
+# (model_qint8_avx512.onnx, model_qint8_avx512_vnni.onnx, model_qint8_arm64.onnx).
+EMBED_ONNX_INT8_FILE = os.getenv("HEAVYLIFT_EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+# Classification: embedding results at/above this similarity are remembered
+# per (domain, field fingerprint) and reused instead of re-embedding.
+LEARNED_MAPPING_MIN_CONFIDENCE = float(os.getenv("HEAVYLIFT_LEARNED_MAPPING_MIN_CONF", "0.60"))
+
+# Corrections cache: per-domain (fingerprint, options_hash) -> correction or
+# "none saved", LRU over domains and over entries within a domain.
+CORRECTIONS_CACHE_MAX_DOMAINS = int(os.getenv("HEAVYLIFT_CORRECTIONS_CACHE_DOMAINS", "64"))
+CORRECTIONS_CACHE_MAX_PER_DOMAIN = int(os.getenv("HEAVYLIFT_CORRECTIONS_CACHE_PER_DOMAIN", "2000"))
+
+# Report / RAG trace logs: written by a background thread from a bounded
+# queue. When the queue is full, "drop" discards the record and "block"
+# waits up to REPORT_BLOCK_TIMEOUT_SECONDS before dropping it (callers on
+# the event loop never wait and drop right away). Files are rotated by
+# size or age into gzip archives, keeping the newest N.
+REPORT_QUEUE_MAX = int(os.getenv("HEAVYLIFT_REPORT_QUEUE_MAX", "10000"))
+REPORT_QUEUE_POLICY = os.getenv("HEAVYLIFT_REPORT_QUEUE_POLICY", "drop")
+REPORT_BLOCK_TIMEOUT_SECONDS = float(os.getenv("HEAVYLIFT_REPORT_BLOCK_TIMEOUT", "0.5"))
+REPORT_FLUSH_INTERVAL_SECONDS = float(os.getenv("HEAVYLIFT_REPORT_FLUSH_INTERVAL", "1.0"))
+REPORT_FLUSH_BATCH = int(os.getenv("HEAVYLIFT_REPORT_FLUSH_BATCH", "500"))
+REPORT_ROTATE_BYTES = int(os.getenv("HEAVYLIFT_REPORT_ROTATE_BYTES", str(50 * 1024 * 1024)))
+REPORT_ROTATE_SECONDS = int(os.getenv("HEAVYLIFT_REPORT_ROTATE_SECONDS", str(24 * 3600)))
+REPORT_ARCHIVES_KEEP = int(os.getenv("HEAVYLIFT_REPORT_ARCHIVES_KEEP", "30"))
+# RAG traces keep fact keys/labels/scores; the profile values themselves
+# are only logged when this is on.
+TRACE_FACT_VALUES = os.getenv("HEAVYLIFT_TRACE_FACT_VALUES", "0") == "1"
+
+# Resume uploads are streamed to disk in chunks of this size and rejected
+# (413) once they exceed the maximum.
+RESUME_MAX_BYTES = int(os.getenv("HEAVYLIFT_RESUME_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("HEAVYLIFT_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+# Resume indexing (extract -> chunk -> embed -> FAISS) runs in a process
+# pool of this many workers, queued by every upload.
+INDEX_WORKERS = int(os.getenv("HEAVYLIFT_INDEX_WORKERS", "1"))
+INDEX_ON_UPLOAD = os.getenv("HEAVYLIFT_INDEX_ON_UPLOAD", "1") == "1"
+
+# A running indexing job heartbeats every INDEX_JOB_HEARTBEAT_SECONDS. One
+# whose heartbeat is older than INDEX_JOB_STALE_SECONDS was abandoned (its
+# server or worker died) and is requeued; a job is stopped and marked
+# failed once it has run for INDEX_JOB_TIMEOUT_SECONDS.
+INDEX_JOB_HEARTBEAT_SECONDS = float(os.getenv("HEAVYLIFT_INDEX_JOB_HEARTBEAT_SECONDS", "10"))
+INDEX_JOB_STALE_SECONDS = float(os.getenv("HEAVYLIFT_INDEX_JOB_STALE_SECONDS", "60"))
+INDEX_JOB_TIMEOUT_SECONDS = float(os.getenv("HEAVYLIFT_INDEX_JOB_TIMEOUT_SECONDS", "900"))
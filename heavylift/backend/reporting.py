@@ -1,12 +1,236 @@
 # backend/reporting.py
+from __future__ import annotations
 
-from pathlib import Path
-from models import ScanReport  # <-- plain import, not relative
+import asyncio
+import atexit
+import gzip
 import json
+import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from db import DATA_DIR
+from models import ScanReport  # <-- plain import, not relative
+from rag_config import (
+    REPORT_ARCHIVES_KEEP,
+    REPORT_BLOCK_TIMEOUT_SECONDS,
+    REPORT_FLUSH_BATCH,
+    REPORT_FLUSH_INTERVAL_SECONDS,
+    REPORT_QUEUE_MAX,
+    REPORT_QUEUE_POLICY,
+    REPORT_ROTATE_BYTES,
+    REPORT_ROTATE_SECONDS,
+    TRACE_FACT_VALUES,
+)
+
+if REPORT_QUEUE_POLICY not in ("drop", "block"):
+    raise RuntimeError(f"HEAVYLIFT_REPORT_QUEUE_POLICY must be 'drop' or 'block', got {REPORT_QUEUE_POLICY!r}")
+
+# data/reports.jsonl
+REPORTS_PATH = DATA_DIR / "reports.jsonl"
+RAG_TRACE_PATH = DATA_DIR / "rag_traces.jsonl"
+
+
+def _report_line(report: ScanReport) -> str:
+    return report.json()
+
+
+def _trace_line(payload: dict) -> str:
+    if not TRACE_FACT_VALUES and "top_facts" in payload:
+        payload = {
+            **payload,
+            "top_facts": [{k: v for k, v in f.items() if k != "value"} for f in payload["top_facts"]],
+        }
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _started_at(path: Path) -> float:
+    """
+    When an existing log file was started: the timestamp of its first
+    record, else the file's birth time where the OS has one, else its
+    oldest stat time.
+    """
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            first = json.loads(f.readline())
+        if isinstance(first.get("timestamp"), (int, float)):
+            return float(first["timestamp"])
+        if isinstance(first.get("ts"), str):
+            return datetime.fromisoformat(first["ts"]).timestamp()
+    except (OSError, ValueError, AttributeError):
+        pass
+    st = path.stat()
+    return getattr(st, "st_birthtime", None) or min(st.st_mtime, st.st_ctime)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class _BackgroundWriter:
+    """
+    One daemon thread appends JSONL records for every stream. Callers only
+    enqueue (serialization happens on the writer thread); records are
+    written in batches, and a stream's file is rotated into a timestamped
+    .jsonl.gz archive once it is too big or too old.
+    """
+
+    def __init__(self, streams: Dict[str, Tuple[Path, Callable[[object], str]]]):
+        self._streams = streams
+        self._queue: "queue.Queue[Tuple[str, object]]" = queue.Queue(maxsize=REPORT_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._opened_at: Dict[str, float] = {}
+        self._counters = {"enqueued": 0, "written": 0, "dropped": 0, "flushes": 0, "rotations": 0, "errors": 0}
+        self._last_error: Optional[str] = None
+
+    def _bump(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._counters[name] += n
 
-# data/reports.jsonl (relative to backend folder)
-REPORTS_PATH = Path(__file__).parent / "data" / "reports.jsonl"
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="heavylift-report-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, stream: str, record: object) -> bool:
+        """
+        Hand a record to the writer. Returns False if it was dropped because
+        the queue was full. Under policy "block" a full queue is waited on
+        for up to REPORT_BLOCK_TIMEOUT_SECONDS, except on an event loop
+        thread: stalling the loop would stall every request, so there the
+        record is dropped (and counted) as under "drop".
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((stream, record))
+        except queue.Full:
+            if REPORT_QUEUE_POLICY == "block" and not _on_event_loop():
+                return self._put_blocking(stream, record)
+            self._bump("dropped")
+            return False
+        self._bump("enqueued")
+        return True
+
+    def _put_blocking(self, stream: str, record: object) -> bool:
+        try:
+            self._queue.put((stream, record), timeout=REPORT_BLOCK_TIMEOUT_SECONDS)
+        except queue.Full:
+            self._bump("dropped")
+            return False
+        self._bump("enqueued")
+        return True
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=REPORT_FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+
+            batch = [item]
+            while len(batch) < REPORT_FLUSH_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                self._bump("errors")
+                self._last_error = f"{type(e).__name__}: {e}"
+                print("[reporting] write failed:", self._last_error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Tuple[str, object]]) -> None:
+        by_stream: Dict[str, List[str]] = {}
+        for stream, record in batch:
+            by_stream.setdefault(stream, []).append(self._streams[stream][1](record))
+
+        for stream, lines in by_stream.items():
+            path = self._streams[stream][0]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._maybe_rotate(stream, path)
+            with path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self._bump("written", len(lines))
+        if by_stream:
+            self._bump("flushes")
+
+    def _maybe_rotate(self, stream: str, path: Path) -> None:
+        now = time.time()
+        if not path.exists():
+            self._opened_at[stream] = now
+            return
+        if stream not in self._opened_at:
+            # A file left by an earlier process keeps its age across restarts
+            self._opened_at[stream] = _started_at(path)
+        opened = self._opened_at[stream]
+        if path.stat().st_size < REPORT_ROTATE_BYTES and now - opened < REPORT_ROTATE_SECONDS:
+            return
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        rotating = path.with_name(f"{path.stem}.{stamp}.jsonl")
+        os.replace(path, rotating)
+        with rotating.open("rb") as src, gzip.open(rotating.with_suffix(".jsonl.gz"), "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        rotating.unlink()
+        self._opened_at[stream] = now
+        self._bump("rotations")
+
+        if REPORT_ARCHIVES_KEEP > 0:
+            archives = sorted(path.parent.glob(f"{path.stem}.*.jsonl.gz"))
+            for old in archives[:-REPORT_ARCHIVES_KEEP]:
+                old.unlink()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until everything enqueued so far is on disk (or timeout).
+        """
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "queue_depth": self._queue.qsize(),
+            "queue_max": REPORT_QUEUE_MAX,
+            "policy": REPORT_QUEUE_POLICY,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_error": self._last_error,
+        }
+
+
+_writer = _BackgroundWriter(
+    {
+        "reports": (REPORTS_PATH, _report_line),
+        "rag_traces": (RAG_TRACE_PATH, _trace_line),
+    }
+)
+atexit.register(_writer.flush)
 
 
 def append_scan_report(report: ScanReport) -> None:
@@ -16,22 +240,21 @@ def append_scan_report(report: ScanReport) -> None:
     This is your 'live report' log. Each scan of a page will write
     one line here, so you can analyze unknown/low-confidence fields later.
     """
-    REPORTS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with REPORTS_PATH.open("a", encoding="utf-8") as f:
-        f.write(report.json() + "\n")
-
-
-RAG_TRACE_PATH = Path(__file__).parent / "data" / "rag_traces.jsonl"
+    _writer.submit("reports", report)
 
 
 def append_rag_trace(payload: dict) -> None:
     """
     Append one line of JSON for Gemini/RAG decisions (debugging only).
+    The payload is serialized later on the writer thread, so callers must
+    not mutate it afterwards.
     """
-    RAG_TRACE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    payload = {
-        "ts": datetime.now(timezone.utc).isoformat(),
-        **payload,
-    }
-    with RAG_TRACE_PATH.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
\ No newline at end of file
+    _writer.submit("rag_traces", {"ts": datetime.now(timezone.utc).isoformat(), **payload})
+
+
+def flush_reports(timeout: float = 5.0) -> bool:
+    return _writer.flush(timeout)
+
+
+def reporting_stats() -> dict:
+    return _writer.stats()
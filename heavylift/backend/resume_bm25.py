@@ -0,0 +1,202 @@
+# backend/resume_bm25.py
+from __future__ import annotations
+
+import heapq
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from db import DATA_DIR
+from rag_config import BM25_B, BM25_CACHE_MAX_INDEXES, BM25_K1
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9.]+")
+
+
+def tokenize(text: str) -> List[str]:
+    # Same split as the old substring scan; dots are kept so "3.85" and
+    # "u.s." stay whole, but trailing sentence dots are dropped.
+    out = []
+    for t in _TOKEN_SPLIT.split((text or "").lower()):
+        t = t.strip(".")
+        if t:
+            out.append(t)
+    return out
+
+
+def _bm25_path(resume_id: int) -> Path:
+    return DATA_DIR / f"resume_{resume_id}.bm25.npz"
+
+
+def build_bm25_index(resume_id: int, chunks: Sequence[Dict[str, object]]) -> None:
+    """
+    Write the inverted index for a resume's chunks (as returned by
+    resume_ingest.load_chunks, in chunk_index order): sorted vocabulary,
+    CSR-style postings (doc, term frequency) and document lengths.
+    Scores are derived at load time, so BM25 parameters can change
+    without a rebuild.
+    """
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    doc_len = np.zeros(len(chunks), dtype=np.int32)
+    for d, ch in enumerate(chunks):
+        counts = Counter(tokenize(str(ch["text"] or "")))
+        doc_len[d] = sum(counts.values())
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((d, tf))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    docs: List[int] = []
+    tfs: List[int] = []
+    for i, term in enumerate(terms):
+        for d, tf in postings[term]:
+            docs.append(d)
+            tfs.append(min(tf, 65535))
+        offsets[i + 1] = len(docs)
+
+    path = _bm25_path(resume_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        np.savez_compressed(
+            f,
+            terms=np.array(terms, dtype=str),
+            offsets=offsets,
+            docs=np.array(docs, dtype=np.int32),
+            tfs=np.array(tfs, dtype=np.uint16),
+            doc_len=doc_len,
+            chunk_ids=np.array([int(ch["chunk_id"]) for ch in chunks], dtype=np.int64),
+            chunk_index=np.array([int(ch["chunk_index"]) for ch in chunks], dtype=np.int32),
+        )
+    os.replace(tmp_path, path)
+    _invalidate(resume_id)
+
+
+@dataclass
+class _LoadedBM25:
+    version: Tuple[int, int]  # (mtime_ns, size) of the file it was read from
+    term_ids: Dict[str, int]
+    offsets: np.ndarray
+    docs: np.ndarray
+    weights: np.ndarray  # per posting: idf * saturated, length-normalized tf
+    chunk_ids: np.ndarray
+    chunk_index: np.ndarray
+    nbytes: int
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, int, float]]:
+        n_docs = len(self.chunk_ids)
+        if n_docs == 0:
+            return []
+        scores = np.zeros(n_docs, dtype=np.float32)
+        hit = False
+        for term in dict.fromkeys(tokenize(query)):
+            t = self.term_ids.get(term)
+            if t is None:
+                continue
+            s, e = self.offsets[t], self.offsets[t + 1]
+            # a term occurs at most once per doc in its postings list
+            scores[self.docs[s:e]] += self.weights[s:e]
+            hit = True
+        if not hit:
+            return []
+
+        best = heapq.nlargest(top_k, np.flatnonzero(scores).tolist(), key=scores.__getitem__)
+        return [(int(self.chunk_ids[d]), int(self.chunk_index[d]), float(scores[d])) for d in best]
+
+
+def _from_arrays(version: Tuple[int, int], z) -> _LoadedBM25:
+    offsets = z["offsets"]
+    docs = z["docs"]
+    tfs = z["tfs"].astype(np.float32)
+    doc_len = z["doc_len"].astype(np.float32)
+    n_docs = len(doc_len)
+
+    df = np.diff(offsets).astype(np.float32)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    avgdl = float(doc_len.mean()) if n_docs and doc_len.sum() else 1.0
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len[docs] / avgdl)
+    weights = (np.repeat(idf, np.diff(offsets)) * tfs * (BM25_K1 + 1.0) / (tfs + norm)).astype(np.float32)
+
+    terms = z["terms"].tolist()
+    return _LoadedBM25(
+        version=version,
+        term_ids={t: i for i, t in enumerate(terms)},
+        offsets=offsets,
+        docs=docs,
+        weights=weights,
+        chunk_ids=z["chunk_ids"],
+        chunk_index=z["chunk_index"],
+        nbytes=offsets.nbytes + docs.nbytes + weights.nbytes + sum(len(t) for t in terms),
+    )
+
+
+# Process-wide LRU of loaded indexes: resume_id -> _LoadedBM25
+_cache: "OrderedDict[int, _LoadedBM25]" = OrderedDict()
+_lock = threading.Lock()
+_counters = {"hits": 0, "loads": 0, "evictions": 0}
+
+
+def _invalidate(resume_id: int) -> None:
+    with _lock:
+        _cache.pop(resume_id, None)
+
+
+def _load(resume_id: int) -> Optional[_LoadedBM25]:
+    path = _bm25_path(resume_id)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        _invalidate(resume_id)
+        return None
+    version = (st.st_mtime_ns, st.st_size)
+
+    with _lock:
+        hit = _cache.get(resume_id)
+        if hit is not None and hit.version == version:
+            _cache.move_to_end(resume_id)
+            _counters["hits"] += 1
+            return hit
+
+    with np.load(path, allow_pickle=False) as z:
+        loaded = _from_arrays(version, z)
+
+    with _lock:
+        _cache[resume_id] = loaded
+        _cache.move_to_end(resume_id)
+        _counters["loads"] += 1
+        while len(_cache) > BM25_CACHE_MAX_INDEXES:
+            _cache.popitem(last=False)
+            _counters["evictions"] += 1
+    return loaded
+
+
+def has_bm25_index(resume_id: int) -> bool:
+    return _bm25_path(resume_id).exists()
+
+
+def search_bm25(resume_id: int, query: str, top_k: int = 5) -> Optional[List[Tuple[int, int, float]]]:
+    """
+    Top-k chunks for a query as [(chunk_id, chunk_index, score)], best
+    first. None means the resume has no index file yet.
+    """
+    index = _load(resume_id)
+    if index is None:
+        return None
+    return index.search(query, top_k)
+
+
+def bm25_cache_stats() -> dict:
+    with _lock:
+        entries = list(_cache.values())
+        counters = dict(_counters)
+    return {
+        **counters,
+        "resident_indexes": len(entries),
+        "resident_bytes": sum(e.nbytes for e in entries),
+        "max_indexes": BM25_CACHE_MAX_INDEXES,
+    }
@@ -1,101 +1,331 @@
 # backend/resume_index.py
 from __future__ import annotations
 
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
 
-import faiss
 import numpy as np
+from sqlalchemy import or_, select, update
 from sqlalchemy.orm import Session
 
-from db import DATA_DIR
+from db import DATA_DIR, SessionLocal
 from db_models import ResumeChunk
-from embeddings import embed_texts
-from resume_ingest import extract_pdf_text, chunk_text
+from decision_cache import invalidate_resume
+from embeddings import EMBEDDING_MODEL_ID, embed_texts
+from rag_config import FAISS_CACHE_MAX_INDEXES, FAISS_MMAP_MIN_BYTES
+from resume_ingest import ingest_resume
+
+if TYPE_CHECKING:
+    import faiss
 
 
 def _index_path(resume_id: int) -> Path:
     return DATA_DIR / f"resume_{resume_id}.faiss"
 
 
+def _chunks_path(resume_id: int) -> Path:
+    # Chunk ids/texts in FAISS id order, written alongside each index file
+    return DATA_DIR / f"resume_{resume_id}.chunks.npz"
+
+
+# Each build appends _BUILD_TAG + a random token to the index file (FAISS
+# ignores trailing bytes) and stores the same token in the chunk table, so
+# a reader only trusts a sidecar written by the build that wrote the index.
+_BUILD_TAG = b"HLBUILD1"
+_BUILD_TOKEN_BYTES = 16
+
+
+def _read_build_token(idx_path: Path) -> Optional[str]:
+    trailer = len(_BUILD_TAG) + _BUILD_TOKEN_BYTES
+    try:
+        with idx_path.open("rb") as f:
+            f.seek(-trailer, os.SEEK_END)
+            data = f.read(trailer)
+    except OSError:  # missing, or shorter than a trailer
+        return None
+    if not data.startswith(_BUILD_TAG):
+        return None
+    return data[len(_BUILD_TAG):].hex()
+
+
+@dataclass
+class _ChunkTable:
+    chunk_ids: np.ndarray
+    chunk_index: np.ndarray
+    texts: List[str]
+    nbytes: int
+
+
+@dataclass
+class _CachedIndex:
+    version: Tuple[int, int]  # (mtime_ns, size) of the file it was read from
+    index: "faiss.Index"
+    nbytes: int
+    mmapped: bool
+    chunks: Optional[_ChunkTable]  # None: no usable sidecar, texts come from the DB
+
+
+# Process-wide LRU of loaded indexes: resume_id -> _CachedIndex
+_index_cache: "OrderedDict[int, _CachedIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+_index_counters = {"hits": 0, "loads": 0, "evictions": 0}
+
+
+def _invalidate_index(resume_id: int) -> None:
+    with _index_lock:
+        _index_cache.pop(resume_id, None)
+
+
+def _load_chunk_table(resume_id: int, ntotal: int, build: Optional[str]) -> Optional[_ChunkTable]:
+    if build is None:
+        # Index built before build tokens existed
+        return None
+    try:
+        with np.load(_chunks_path(resume_id), allow_pickle=False) as z:
+            if "build" not in z.files or str(z["build"]) != build:
+                # Sidecar from another build (caught mid-rebuild)
+                return None
+            chunk_ids, chunk_index, texts = z["chunk_ids"], z["chunk_index"], z["texts"].tolist()
+    except FileNotFoundError:
+        return None
+    if len(chunk_ids) != ntotal:
+        return None
+    return _ChunkTable(
+        chunk_ids=chunk_ids,
+        chunk_index=chunk_index,
+        texts=texts,
+        nbytes=chunk_ids.nbytes + chunk_index.nbytes + sum(len(t) for t in texts),
+    )
+
+
+def _load_index(resume_id: int) -> Optional[_CachedIndex]:
+    """
+    Return the FAISS index (and its chunk texts) for a resume, reading it
+    from disk only when it is not cached or the file changed since it was
+    cached (mtime/size). Big files are memory-mapped rather than copied
+    into RAM.
+    """
+    idx_path = _index_path(resume_id)
+    try:
+        st = idx_path.stat()
+    except FileNotFoundError:
+        _invalidate_index(resume_id)
+        return None
+    version = (st.st_mtime_ns, st.st_size)
+
+    with _index_lock:
+        hit = _index_cache.get(resume_id)
+        if hit is not None and hit.version == version:
+            _index_cache.move_to_end(resume_id)
+            _index_counters["hits"] += 1
+            return hit
+
+    import faiss
+
+    mmapped = st.st_size >= FAISS_MMAP_MIN_BYTES
+    flags = (faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY) if mmapped else 0
+    index = faiss.read_index(str(idx_path), flags)
+    entry = _CachedIndex(
+        version=version,
+        index=index,
+        nbytes=st.st_size,
+        mmapped=mmapped,
+        chunks=_load_chunk_table(resume_id, index.ntotal, _read_build_token(idx_path)),
+    )
+
+    with _index_lock:
+        _index_cache[resume_id] = entry
+        _index_cache.move_to_end(resume_id)
+        _index_counters["loads"] += 1
+        while len(_index_cache) > FAISS_CACHE_MAX_INDEXES:
+            _index_cache.popitem(last=False)
+            _index_counters["evictions"] += 1
+    return entry
+
+
+def index_cache_stats() -> dict:
+    with _index_lock:
+        entries = list(_index_cache.values())
+        counters = dict(_index_counters)
+    return {
+        **counters,
+        "resident_indexes": len(entries),
+        "resident_bytes": sum(e.nbytes for e in entries if not e.mmapped),
+        "mmapped_indexes": sum(1 for e in entries if e.mmapped),
+        "mmapped_bytes": sum(e.nbytes for e in entries if e.mmapped),
+        "chunk_text_bytes": sum(e.chunks.nbytes for e in entries if e.chunks is not None),
+        "indexes_without_chunk_texts": sum(1 for e in entries if e.chunks is None),
+        "max_indexes": FAISS_CACHE_MAX_INDEXES,
+    }
+
+
 def _normalize(v: np.ndarray) -> np.ndarray:
     # embeddings.py already normalizes, but keep this safe
     norms = np.linalg.norm(v, axis=1, keepdims=True) + 1e-12
     return v / norms
 
 
-def build_index_for_resume(db: Session, resume_id: int, pdf_path: str) -> None:
+def _embed_missing(db: Session, resume_id: int) -> int:
     """
-    Extract -> chunk -> store chunks in DB -> build FAISS index file.
-    Safe to call multiple times (rebuilds by deleting old rows/index).
+    Embed (in one batch) the chunks that have no vector from the current
+    model yet, and store the vectors on their rows.
     """
-    text = extract_pdf_text(pdf_path)
-    chunks = chunk_text(text)
+    rows = db.execute(
+        select(ResumeChunk.id, ResumeChunk.text)
+        .where(ResumeChunk.resume_id == resume_id)
+        .where(
+            or_(
+                ResumeChunk.embedding.is_(None),
+                ResumeChunk.embedding_model.is_(None),
+                ResumeChunk.embedding_model != EMBEDDING_MODEL_ID,
+            )
+        )
+    ).all()
+    if not rows:
+        return 0
 
-    # Remove old chunks (if re-indexing)
-    db.query(ResumeChunk).filter(ResumeChunk.resume_id == resume_id).delete()
+    vecs = _normalize(np.asarray(embed_texts([t for _, t in rows]), dtype=np.float32))
+    db.execute(
+        update(ResumeChunk),
+        [
+            {"id": row_id, "embedding": v.tobytes(), "embedding_model": EMBEDDING_MODEL_ID}
+            for (row_id, _), v in zip(rows, vecs)
+        ],
+    )
     db.commit()
+    return len(rows)
 
-    # Insert chunks
-    for idx, ch in enumerate(chunks):
-        db.add(ResumeChunk(resume_id=resume_id, chunk_index=idx, text=ch))
-    db.commit()
 
-    if not chunks:
+def build_index_for_resume(db: Session, resume_id: int, pdf_path: str) -> None:
+    """
+    Ingest (shared chunk store) -> embed only chunks without a vector ->
+    build the FAISS index file from the stored vectors.
+    Safe to call multiple times; an unchanged resume costs no model calls.
+    """
+    changed, moved = ingest_resume(db, resume_id, pdf_path)
+    embedded = _embed_missing(db, resume_id)
+    if changed:
+        # Cached Gemini decisions may cite removed chunks
+        invalidate_resume(db, resume_id)
+
+    idx_path = _index_path(resume_id)
+    if not (changed or moved or embedded) and idx_path.exists():
+        return
+
+    rows = db.execute(
+        select(ResumeChunk.id, ResumeChunk.chunk_index, ResumeChunk.text, ResumeChunk.embedding)
+        .where(ResumeChunk.resume_id == resume_id)
+        .order_by(ResumeChunk.chunk_index)
+    ).all()
+    print(f"[resume index] resume {resume_id}: {embedded} chunks embedded, {len(rows)} indexed")
+
+    chunks_path = _chunks_path(resume_id)
+    if not rows:
         # create empty index? just skip
-        idx_path = _index_path(resume_id)
-        if idx_path.exists():
-            idx_path.unlink()
+        for p in (idx_path, chunks_path):
+            if p.exists():
+                p.unlink()
+        _invalidate_index(resume_id)
         return
 
-    # Embed chunks (normalized cosine)
-    vecs = embed_texts(chunks)  # embeddings.py uses normalize_embeddings=True
-    vecs = vecs.astype(np.float32)
-    vecs = _normalize(vecs)
+    vecs = np.stack([np.frombuffer(r.embedding, dtype=np.float32) for r in rows])
+
+    import faiss
 
     dim = vecs.shape[1]
     index = faiss.IndexFlatIP(dim)
     index.add(vecs)  # ids correspond to chunk_index order
-    faiss.write_index(index, str(_index_path(resume_id)))
 
+    # The chunk table (row i = FAISS id i) is swapped in first; a reader that
+    # pairs it with the old index sees a build token mismatch and uses the DB.
+    token = os.urandom(_BUILD_TOKEN_BYTES)
+    tmp_chunks = chunks_path.with_name(f"{chunks_path.name}.{os.getpid()}.tmp")
+    with tmp_chunks.open("wb") as f:
+        np.savez(
+            f,
+            chunk_ids=np.array([r.id for r in rows], dtype=np.int64),
+            chunk_index=np.array([r.chunk_index for r in rows], dtype=np.int32),
+            texts=np.array([r.text for r in rows], dtype=str),
+            build=np.array(token.hex()),
+        )
+    os.replace(tmp_chunks, chunks_path)
 
-def search_resume(db: Session, resume_id: int, query: str, top_k: int = 8) -> List[dict]:
+    # Write next to the old file and swap it in, so a search holding the old
+    # (possibly memory-mapped) index never sees a half-written file.
+    tmp_path = idx_path.with_name(f"{idx_path.name}.{os.getpid()}.tmp")
+    faiss.write_index(index, str(tmp_path))
+    with tmp_path.open("ab") as f:
+        f.write(_BUILD_TAG + token)
+    os.replace(tmp_path, idx_path)
+    _invalidate_index(resume_id)
+
+
+def search_resume_batch(
+    resume_id: int,
+    queries: Sequence[str],
+    top_k: int = 8,
+    db: Optional[Session] = None,
+) -> List[List[dict]]:
     """
-    Returns [{chunk_id, chunk_index, text, score}]
+    Vector search for several questions at once: one embedding call and one
+    index.search over the query matrix. Returns, per query,
+    [{chunk_id, chunk_index, text, score}] best first. Texts come from the
+    in-memory chunk table cached with the index; only indexes without one
+    fall back to a single DB query for the whole batch.
     """
-    idx_path = _index_path(resume_id)
-    if not idx_path.exists():
+    if not queries:
         return []
+    entry = _load_index(resume_id)
+    if entry is None or entry.index.ntotal == 0:
+        return [[] for _ in queries]
 
-    index = faiss.read_index(str(idx_path))
+    qvecs = _normalize(np.asarray(embed_texts(list(queries)), dtype=np.float32))  # already normalized
+    scores, ids = entry.index.search(qvecs, min(top_k, entry.index.ntotal))
 
-    qvec = embed_texts([query]).astype(np.float32)  # already normalized
-    qvec = _normalize(qvec)
+    table = entry.chunks
+    if table is not None:
+        def lookup(pos: int) -> Optional[Tuple[int, int, str]]:
+            return int(table.chunk_ids[pos]), int(table.chunk_index[pos]), table.texts[pos]
+    else:
+        # FAISS ids are chunk_index positions
+        wanted = sorted({int(i) for i in ids.ravel() if i >= 0})
+        own_session = db is None
+        session = SessionLocal() if own_session else db
+        try:
+            rows = session.execute(
+                select(ResumeChunk.id, ResumeChunk.chunk_index, ResumeChunk.text)
+                .where(ResumeChunk.resume_id == resume_id)
+                .where(ResumeChunk.chunk_index.in_(wanted))
+            ).all()
+        finally:
+            if own_session:
+                session.close()
+        by_idx = {ci: (row_id, ci, text) for row_id, ci, text in rows}
 
-    scores, ids = index.search(qvec, top_k)
-    ids = ids[0].tolist()
-    scores = scores[0].tolist()
+        def lookup(pos: int) -> Optional[Tuple[int, int, str]]:
+            return by_idx.get(pos)
 
-    # Fetch chunks by chunk_index
-    rows = (
-        db.query(ResumeChunk)
-        .filter(ResumeChunk.resume_id == resume_id)
-        .filter(ResumeChunk.chunk_index.in_(ids))
-        .all()
-    )
-    by_idx = {r.chunk_index: r for r in rows}
-
-    out: List[dict] = []
-    for score, idx in zip(scores, ids):
-        r = by_idx.get(idx)
-        if not r:
-            continue
-        out.append(
-            {
-                "chunk_id": r.id,
-                "chunk_index": r.chunk_index,
-                "text": r.text,
-                "score": float(score),
-            }
-        )
+    out: List[List[dict]] = []
+    for row_scores, row_ids in zip(scores.tolist(), ids.tolist()):
+        hits: List[dict] = []
+        for score, pos in zip(row_scores, row_ids):
+            if pos < 0:
+                continue
+            found = lookup(pos)
+            if found is None:
+                continue
+            chunk_id, chunk_index, text = found
+            hits.append({"chunk_id": chunk_id, "chunk_index": chunk_index, "text": text, "score": float(score)})
+        out.append(hits)
     return out
+
+
+def search_resume(db: Session, resume_id: int, query: str, top_k: int = 8) -> List[dict]:
+    """
+    Returns [{chunk_id, chunk_index, text, score}]
+    """
+    return search_resume_batch(resume_id, [query], top_k, db=db)[0]
@@ -1,14 +1,31 @@
 # backend/resume_ingest.py
 from __future__ import annotations
 
+import hashlib
+import os
+import threading
 from pathlib import Path
-from typing import List
-from pypdf import PdfReader
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from db import DATA_DIR, utcnow
+from db_models import Resume, ResumeChunk
 from rag_config import RESUME_CHUNK_SIZE, RESUME_CHUNK_OVERLAP
+from resume_bm25 import build_bm25_index, has_bm25_index
+
+# Extracted text per file content (sha256), so a PDF is parsed at most once
+TEXT_DIR = DATA_DIR / "resume_text"
+
+# Serializes ingestion of the same resume within a process
+_ingest_locks: Dict[int, threading.Lock] = {}
+_ingest_locks_guard = threading.Lock()
 
 
 def extract_pdf_text(pdf_path: str) -> str:
+    from pypdf import PdfReader
+
     reader = PdfReader(pdf_path)
     parts: List[str] = []
     for page in reader.pages:
@@ -35,3 +52,130 @@ def chunk_text(text: str, chunk_size: int = RESUME_CHUNK_SIZE, overlap: int = RE
         i += step
 
     return chunks
+
+
+def resume_text(path: str, sha256: Optional[str] = None) -> str:
+    """
+    Plain text of a resume file, read from the per-sha256 text cache when
+    possible. Non-PDF files (.txt/.md etc) are read as text.
+    """
+    cached = TEXT_DIR / f"{sha256}.txt" if sha256 else None
+    if cached is not None and cached.exists():
+        return cached.read_text(encoding="utf-8")
+
+    p = Path(path)
+    if p.suffix.lower() == ".pdf":
+        text = extract_pdf_text(str(p))
+    else:
+        text = p.read_text(encoding="utf-8", errors="ignore")
+
+    if cached is not None:
+        TEXT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, cached)
+    return text
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def sync_chunks(db: Session, resume_id: int, chunks: List[str]) -> Tuple[bool, bool]:
+    """
+    Make the stored ResumeChunk rows equal `chunks` (in order) by diff:
+    rows whose text is unchanged are kept, with their id and any stored
+    vector, and only moved to their new chunk_index; the rest are
+    bulk-deleted and new texts bulk-inserted (without embeddings).
+    Returns (rows added or removed, rows moved).
+    """
+    existing = db.execute(
+        select(ResumeChunk.id, ResumeChunk.chunk_index, ResumeChunk.content_hash)
+        .where(ResumeChunk.resume_id == resume_id)
+        .order_by(ResumeChunk.chunk_index, ResumeChunk.id)
+    ).all()
+
+    reusable: Dict[str, List[int]] = {}
+    old_index: Dict[int, int] = {}
+    for row_id, chunk_index, h in existing:
+        old_index[row_id] = chunk_index
+        if h:
+            reusable.setdefault(h, []).append(row_id)
+
+    moves: List[dict] = []
+    new_rows: List[dict] = []
+    kept: set = set()
+    now = utcnow()
+    for idx, text in enumerate(chunks):
+        h = content_hash(text)
+        candidates = reusable.get(h)
+        if candidates:
+            row_id = candidates.pop(0)
+            kept.add(row_id)
+            if old_index[row_id] != idx:
+                moves.append({"id": row_id, "chunk_index": idx})
+        else:
+            new_rows.append(
+                {"resume_id": resume_id, "chunk_index": idx, "text": text, "content_hash": h, "created_at": now}
+            )
+
+    stale = [row_id for row_id in old_index if row_id not in kept]
+    if stale:
+        db.execute(delete(ResumeChunk).where(ResumeChunk.id.in_(stale)))
+    if moves:
+        db.execute(update(ResumeChunk), moves)
+    if new_rows:
+        db.execute(insert(ResumeChunk), new_rows)
+    db.commit()
+
+    print(
+        f"[resume ingest] resume {resume_id}: {len(kept)} chunks kept, "
+        f"{len(new_rows)} added, {len(stale)} removed"
+    )
+    return bool(stale or new_rows), bool(moves)
+
+
+def _ingest_lock(resume_id: int) -> threading.Lock:
+    with _ingest_locks_guard:
+        return _ingest_locks.setdefault(resume_id, threading.Lock())
+
+
+def ingest_resume(db: Session, resume_id: int, path: Optional[str] = None) -> Tuple[bool, bool]:
+    """
+    The one ingestion pass: text (extracted once per sha256) -> chunks ->
+    ResumeChunk rows -> BM25 keyword index. Returns sync_chunks'
+    (changed, moved).
+    """
+    r = db.get(Resume, resume_id)
+    sha = r.sha256 if r is not None else None
+    path = path or (r.stored_path if r is not None else None)
+
+    with _ingest_lock(resume_id):
+        changed, moved = sync_chunks(db, resume_id, chunk_text(resume_text(path, sha)) if path else [])
+        if changed or moved or not has_bm25_index(resume_id):
+            build_bm25_index(resume_id, _read_chunks(db, resume_id))
+        return changed, moved
+
+
+def _read_chunks(db: Session, resume_id: int) -> List[Dict[str, object]]:
+    rows = db.execute(
+        select(ResumeChunk.id, ResumeChunk.chunk_index, ResumeChunk.text)
+        .where(ResumeChunk.resume_id == resume_id)
+        .order_by(ResumeChunk.chunk_index)
+    ).all()
+    return [{"chunk_id": i, "chunk_index": ci, "text": t} for i, ci, t in rows]
+
+
+def load_chunks(db: Session, resume_id: int, ingest_missing: bool = True) -> List[Dict[str, object]]:
+    """
+    The canonical chunks of a resume in order: [{chunk_id, chunk_index, text}].
+    A resume that was never ingested (e.g. uploaded before indexing ran)
+    is ingested on first use unless ingest_missing=False; a stored file
+    that is gone just yields no chunks.
+    """
+    chunks = _read_chunks(db, resume_id)
+    r = db.get(Resume, resume_id) if not chunks and ingest_missing else None
+    if r is not None and Path(r.stored_path).exists():
+        ingest_resume(db, resume_id)
+        chunks = _read_chunks(db, resume_id)
+    return chunks
@@ -1,5 +1,7 @@
 # backend/schema.py
-from typing import List, Dict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Tuple
 
 CANONICAL_FIELDS: List[Dict] = [
     # --------- Basic identity (profile) ---------
@@ -324,3 +326,73 @@ CANONICAL_FIELDS: List[Dict] = [
         "sensitive": False,
     },
 ]
+
+
+# ---------- Frozen, indexed view of CANONICAL_FIELDS ----------
+
+
+@dataclass(frozen=True, slots=True)
+class CanonicalField:
+    index: int          # position in CANONICAL_FIELDS / row of the canonical embedding matrix
+    key: str
+    description: str
+    source: str         # 'profile.email' | 'preferences.workAuthUS' | 'none'
+    sensitive: bool
+
+    @property
+    def embedding_text(self) -> str:
+        return f"{self.key}: {self.description}"
+
+
+@dataclass(frozen=True, slots=True)
+class CanonicalRegistry:
+    fields: Tuple[CanonicalField, ...]
+    by_key: Mapping[str, CanonicalField]
+    keys: Tuple[str, ...]                      # index-aligned with fields
+    embedding_texts: Tuple[str, ...]           # index-aligned with fields
+
+    def get(self, key: str) -> Optional[CanonicalField]:
+        return self.by_key.get(key)
+
+    def source_for(self, key: str) -> str:
+        f = self.by_key.get(key)
+        return f.source if f is not None else "none"
+
+    def is_sensitive(self, key: str) -> bool:
+        f = self.by_key.get(key)
+        return f.sensitive if f is not None else False
+
+
+def _build_registry(raw: List[Dict]) -> CanonicalRegistry:
+    fields = tuple(
+        CanonicalField(
+            index=i,
+            key=d["key"],
+            description=d["description"],
+            source=d.get("source", "none"),
+            sensitive=bool(d.get("sensitive", False)),
+        )
+        for i, d in enumerate(raw)
+    )
+
+    by_key: Dict[str, CanonicalField] = {}
+    # Each real source path (not "none") belongs to one canonical key
+    source_owner: Dict[str, str] = {}
+    for f in fields:
+        if f.key in by_key:
+            raise ValueError(f"duplicate canonical key {f.key}")
+        by_key[f.key] = f
+        if f.source != "none":
+            if f.source in source_owner:
+                raise ValueError(f"source {f.source} used by {source_owner[f.source]} and {f.key}")
+            source_owner[f.source] = f.key
+
+    return CanonicalRegistry(
+        fields=fields,
+        by_key=MappingProxyType(by_key),
+        keys=tuple(f.key for f in fields),
+        embedding_texts=tuple(f.embedding_text for f in fields),
+    )
+
+
+REGISTRY = _build_registry(CANONICAL_FIELDS)
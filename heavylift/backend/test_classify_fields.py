@@ -0,0 +1,68 @@
+# backend/test_classify_fields.py
+"""
+Staged field classification with per-domain learned mappings.
+
+    python -m pytest test_classify_fields.py
+
+The embedding stage is replaced by a fixed answer so the test needs no
+model download; everything before it (html_type, rules, learned mappings
+in SQLite) runs for real against a throwaway HEAVYLIFT_DATA_DIR.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+os.environ.setdefault("HEAVYLIFT_DATA_DIR", tempfile.mkdtemp(prefix="heavylift-test-"))
+
+import app
+from db import engine
+from db_models import Base
+from models import FieldInput
+
+Base.metadata.create_all(bind=engine)
+
+
+def _embed_as(key: str, confidence: float):
+    def classify(texts):
+        return [(key, confidence) for _ in texts]
+    return classify
+
+
+def test_unlabeled_fields_with_domain(monkeypatch):
+    # Hidden inputs and unlabeled checkboxes have no label/name/placeholder;
+    # they are never learned and must not break the learned-mapping lookup.
+    monkeypatch.setattr(app, "classify_field_texts", _embed_as("UNKNOWN", 0.0))
+    fields = [
+        FieldInput(id="f1", label="Favourite colour of hats"),
+        FieldInput(id="f2", html_type="hidden"),
+        FieldInput(id="f3", tag="input", html_type="checkbox"),
+    ]
+
+    results, counts = app.classify_fields_staged(fields, domain="unlabeled.example")
+
+    assert [r.field_id for r in results] == ["f1", "f2", "f3"]
+    assert all(r.canonical_key == "UNKNOWN" for r in results)
+    assert counts["embedding"] == 3
+
+
+def test_learned_mapping_skips_unlabeled_fields(monkeypatch):
+    domain = "learned.example"
+    monkeypatch.setattr(app, "classify_field_texts", _embed_as("CITY", 0.95))
+    first, _ = app.classify_fields_staged(
+        [FieldInput(id="a", label="Favourite colour of hats"), FieldInput(id="b", html_type="hidden")],
+        domain=domain,
+    )
+    assert first[0].canonical_key == "CITY"
+
+    # Second visit: the labeled field comes from the learned mapping, the
+    # unlabeled one still goes to the embedding stage.
+    monkeypatch.setattr(app, "classify_field_texts", _embed_as("UNKNOWN", 0.0))
+    second, counts = app.classify_fields_staged(
+        [FieldInput(id="a", label="Favourite colour of hats"), FieldInput(id="b", html_type="hidden")],
+        domain=domain,
+    )
+    assert second[0].canonical_key == "CITY"
+    assert second[1].canonical_key == "UNKNOWN"
+    assert counts["learned"] == 1
+    assert counts["embedding"] == 1
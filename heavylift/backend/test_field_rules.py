@@ -0,0 +1,190 @@
+# backend/test_field_rules.py
+"""
+Golden check for the field rules table.
+
+    python -m pytest test_field_rules.py
+
+_legacy_rule_key below is a frozen copy of the sequential `in` checks that
+app.rule_based_key used before the rules moved into field_rules.RULES.
+match_rule_key must return the same key for every text in the corpus:
+every term alone, every ordered pair of terms (with and without a space),
+random term mixes and some realistic labels.
+"""
+from __future__ import annotations
+
+import random
+from typing import List, Optional
+
+from field_rules import MATCHER, RULES, match_rule_key
+
+
+def _legacy_rule_key(text: str) -> Optional[str]:
+    # ---------- Highly sensitive IDs ----------
+    if "ssn" in text or "social security" in text or "social-security" in text:
+        return "SSN_OR_NATIONAL_ID"
+    if "national id" in text or "national identification" in text:
+        return "SSN_OR_NATIONAL_ID"
+    if "passport" in text:
+        return "PASSPORT_NUMBER"
+    if "driver" in text and "license" in text:
+        return "DRIVERS_LICENSE_NUMBER"
+
+    # ---------- Demographics (some of these you decided to autofill) ----------
+    if "date of birth" in text or "birth date" in text or "dob" in text:
+        return "DATE_OF_BIRTH"
+    if "race" in text or "ethnicity" in text:
+        return "RACE_ETHNICITY"
+    if "gender" in text:
+        return "GENDER"
+    if "disability" in text:
+        return "DISABILITY_STATUS"
+    if "veteran" in text:
+        return "VETERAN_STATUS"
+    if "sexual orientation" in text or "orientation" in text:
+        return "SEXUAL_ORIENTATION"
+    if "criminal" in text or "conviction" in text or "offense" in text:
+        return "CRIMINAL_HISTORY"
+
+    # ---------- Email / phone ----------
+    if "email" in text:
+        return "EMAIL"
+    if "mobile" in text or "cell" in text:
+        return "PHONE_MOBILE"
+    if "phone" in text and "mobile" not in text and "cell" not in text:
+        return "PHONE_MOBILE"
+
+    # ---------- Online presence ----------
+    if "linkedin" in text or "linked in" in text:
+        return "LINKEDIN_URL"
+    if "github" in text or "git hub" in text:
+        return "GITHUB_URL"
+    if "portfolio" in text or "website" in text or "personal site" in text:
+        return "PORTFOLIO_URL"
+
+    # ---------- Name fields (avoid company name) ----------
+    if "first name" in text or "given name" in text or "forename" in text:
+        return "FIRST_NAME"
+    if "middle name" in text:
+        return "MIDDLE_NAME"
+    if "last name" in text or "family name" in text or "surname" in text:
+        return "LAST_NAME"
+    if "preferred name" in text or "preferred first" in text:
+        return "PREFERRED_NAME"
+    if "full name" in text or (
+        "name" in text and "company" not in text and "employer" not in text
+    ):
+        return "FULL_NAME"
+
+    # ---------- Location ----------
+    if "city" in text and "current" in text:
+        return "CITY"
+    if "city" in text and "current" not in text and "state" not in text:
+        return "CITY"
+    if "state" in text or "province" in text or "region" in text:
+        return "STATE"
+    if "country" in text:
+        return "COUNTRY"
+    if "postal" in text or "zip" in text:
+        return "POSTAL_CODE"
+    if "current location" in text:
+        return "CURRENT_LOCATION"
+    if "location" in text and "preferred" not in text:
+        return "CURRENT_LOCATION"
+    if "preferred location" in text or "location preference" in text:
+        return "PREFERRED_LOCATION"
+
+    # ---------- Work authorization / preferences ----------
+    if "authorized to work" in text or "work authorization" in text:
+        if "united states" in text or "us" in text or "u.s." in text:
+            return "WORK_AUTH_US"
+        return "WORK_AUTH_COUNTRY"
+    if "sponsorship" in text:
+        return "NEED_SPONSORSHIP_FUTURE"
+    if "eligible to work" in text:
+        return "ELIGIBLE_TO_WORK_IN_COUNTRY_X"
+
+    if "willing to relocate" in text or "relocate" in text:
+        return "WILLING_TO_RELOCATE"
+    if "on-site" in text or "onsite" in text:
+        return "ON_SITE_OKAY"
+    if "hybrid" in text:
+        return "HYBRID_OKAY"
+    if "travel" in text and "%" in text:
+        return "TRAVEL_PERCENT_MAX"
+
+    # ---------- Timing & comp ----------
+    if "notice period" in text:
+        return "NOTICE_PERIOD"
+    if "earliest start" in text or "start date" in text:
+        return "EARLIEST_START_DATE"
+    if "salary expectation" in text or "desired salary" in text:
+        return "SALARY_EXPECTATIONS"
+    if "hourly rate" in text or "rate expectation" in text:
+        return "HOURLY_RATE_EXPECTATIONS"
+
+    # ---------- Education ----------
+    if "education level" in text or "highest education" in text:
+        return "HIGHEST_EDUCATION_LEVEL"
+    if "field of study" in text or "major" in text:
+        return "FIELD_OF_STUDY"
+    if "institution" in text or "university" in text or "college" in text:
+        return "INSTITUTION_NAME"
+    if "graduation year" in text or "grad year" in text:
+        return "GRADUATION_YEAR"
+
+    # ---------- Long answers ----------
+    if "tell us about yourself" in text:
+        return "LONG_ANSWER_FREEFORM"
+    if "why do you want to work here" in text or "motivation" in text:
+        return "LONG_ANSWER_FREEFORM"
+    if "describe a challenge" in text or "challenge you faced" in text:
+        return "LONG_ANSWER_FREEFORM"
+
+    return None
+
+
+REAL_LABELS = [
+    "First Name", "Last Name", "Company name", "Employer name", "Email address", "Phone",
+    "Mobile phone number", "LinkedIn Profile", "Website", "City", "Current city", "State/Province",
+    "Are you legally authorized to work in the United States?", "Work authorization status",
+    "Will you now or in the future require sponsorship?", "Preferred location", "Location preference",
+    "Willing to travel up to 25%?", "Earliest start date", "Desired salary", "University",
+    "Field of study / Major", "Graduation year", "Why do you want to work here?", "Gender",
+    "Are you a protected veteran?", "Disability status", "Date of birth (DOB)", "ZIP / Postal code",
+    "How did you hear about us?", "Cover letter", "Referral code", "",
+]
+
+
+def golden_corpus(seed: int = 7) -> List[str]:
+    terms = sorted({t for r in RULES for t in (*r.any_of, *[g for grp in r.and_any for g in grp], *r.none_of)})
+    rng = random.Random(seed)
+    out = list(terms)
+    out += [f"{a} {b}" for a in terms for b in terms]
+    out += [f"{a}{b}" for a in terms for b in terms]
+    fillers = ["please", "enter", "your", "the", "status", "(optional)", "_", "-", "field", "us"]
+    for _ in range(20000):
+        k = rng.randint(1, 5)
+        out.append(" ".join(rng.choice(terms + fillers) for _ in range(k)))
+    out += [s.lower() for s in REAL_LABELS]
+    return out
+
+
+def test_rules_match_legacy_chain():
+    corpus = golden_corpus()
+    assert len(corpus) > 37000
+    mismatches = [(text, _legacy_rule_key(text), match_rule_key(text)) for text in corpus]
+    mismatches = [m for m in mismatches if m[1] != m[2]]
+    assert not mismatches, mismatches[:10]
+
+
+def test_precedence():
+    assert match_rule_key("company name") is None
+    assert match_rule_key("current city / state") == "CITY"
+    assert match_rule_key("city, state") == "STATE"
+    assert match_rule_key("mobile phone") == "PHONE_MOBILE"
+    assert match_rule_key("are you authorized to work in the us?") == "WORK_AUTH_US"
+    assert match_rule_key("") is None
+
+
+def test_source_has_one_branch_per_rule():
+    assert MATCHER.source.count("\n    if ") == len(RULES)